@@ -0,0 +1,145 @@
+# arxivApi.py
+import logging
+import os
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+
+from getDocuments import Article, HostThrottle, listing_category, merge_listings
+from runMetrics import metrics
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+ARXIV = '{http://arxiv.org/schemas/atom}'
+OPENSEARCH = '{http://a9.com/-/spec/opensearch/1.1/}'
+
+VERSION_RE = re.compile(r'v\d+$')
+
+class _CountingReader:
+    """Wraps the raw response so bytes are counted as the parser pulls them"""
+
+    def __init__(self, raw: BinaryIO):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes_read += len(data)
+        return data
+
+def _text(element: ET.Element, tag: str) -> str:
+    # Titles and abstracts are hard-wrapped in the feed
+    return " ".join((element.findtext(tag) or "").split())
+
+def entry_article(entry: ET.Element, documents_dir: str, base_url: str,
+                  categories: Sequence[str] = ()) -> Article:
+    """Builds an Article from one <entry>; ids drop the version so they match listing ids, which goes into Article.version instead"""
+    entry_id = entry.findtext(f'{ATOM}id') or ""
+    if '/api/errors' in entry_id:
+        raise ValueError(f"arXiv API error: {_text(entry, f'{ATOM}summary')}")
+    versioned_id = entry_id.split('/abs/', 1)[-1]
+    version = VERSION_RE.search(versioned_id)
+    article_id = VERSION_RE.sub('', versioned_id)
+    terms = [category.get('term') for category in entry.iter(f'{ATOM}category')]
+    primary = entry.find(f'{ARXIV}primary_category')
+    if primary is not None and primary.get('term') in terms:
+        # Primary category first, as on the abstract page
+        terms.insert(0, terms.pop(terms.index(primary.get('term'))))
+    return Article(
+        title=_text(entry, f'{ATOM}title'),
+        pdf_link=f"{base_url}/pdf/{versioned_id}",
+        abstract_link=f"{base_url}/abs/{article_id}",
+        article_id=article_id,
+        pdf_content=os.path.join(documents_dir, f"{article_id}.pdf"),
+        abstract=_text(entry, f'{ATOM}summary'),
+        authors=[_text(author, f'{ATOM}name') for author in entry.iter(f'{ATOM}author')],
+        categories=[term for term in terms if term in categories] if categories else terms,
+        published=entry.findtext(f'{ATOM}published') or "",
+        version=version.group(0) if version else "",
+    )
+
+def iter_feed(stream: BinaryIO, documents_dir: str = "documents", base_url: str = "https://arxiv.org",
+              categories: Sequence[str] = ()) -> Iterator[Tuple[str, object]]:
+    """Parses an Atom feed incrementally, yielding ('total', int) then ('article', Article) per entry.
+
+    Each entry is discarded once converted, so memory stays flat however
+    large the page is.
+    """
+    context = ET.iterparse(stream, events=('start', 'end'))
+    _, root = next(context)
+    for event, element in context:
+        if event != 'end':
+            continue
+        if element.tag == f'{OPENSEARCH}totalResults':
+            yield 'total', int(element.text or 0)
+        elif element.tag == f'{ATOM}entry':
+            yield 'article', entry_article(element, documents_dir, base_url, categories)
+            root.clear()
+
+def category_query(categories: Sequence[str]) -> str:
+    return " OR ".join(f"cat:{category}" for category in categories)
+
+def fetch_api_articles(urls: Sequence[str], session: requests.Session, documents_dir: str = "documents",
+                       api_url: Optional[str] = None, page_size: Optional[int] = None,
+                       max_results: Optional[int] = None, max_age_days: Optional[float] = None,
+                       delay: Optional[float] = None) -> List[Article]:
+    """Queries the arXiv API for the newest papers in the listings' categories, one page at a time.
+
+    All categories go into a single OR query, so cross-listed papers come
+    back once. Paging stops at max_results, at the end of the results, or at
+    the first paper older than max_age_days (0 disables the age cutoff).
+    """
+    if api_url is None:
+        api_url = os.getenv('ARXIV_API_URL', 'https://export.arxiv.org/api/query')
+    if page_size is None:
+        page_size = int(os.getenv('ARXIV_API_PAGE_SIZE', '200'))
+    if max_results is None:
+        max_results = int(os.getenv('ARXIV_API_MAX_RESULTS', '500'))
+    if max_age_days is None:
+        max_age_days = float(os.getenv('ARXIV_API_MAX_AGE_DAYS', '0'))
+    if delay is None:
+        # arXiv asks API clients to wait 3 seconds between calls
+        delay = float(os.getenv('ARXIV_API_DELAY', '3'))
+    base_url = os.getenv('ARXIV_BASE_URL', 'https://arxiv.org').rstrip('/')
+    categories = [listing_category(url) for url in urls]
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=max_age_days)).strftime('%Y-%m-%dT%H:%M:%SZ') \
+        if max_age_days > 0 else ""
+
+    throttle = HostThrottle(delay)
+    articles: List[Article] = []
+    start = 0
+    total = None
+    while start < max_results and (total is None or start < total):
+        params = {
+            'search_query': category_query(categories),
+            'sortBy': 'submittedDate',
+            'sortOrder': 'descending',
+            'start': start,
+            'max_results': min(page_size, max_results - start),
+        }
+        throttle.wait(api_url)
+        page = 0
+        reached_cutoff = False
+        with metrics.timed('listing_fetch', source='api'), \
+                session.get(api_url, params=params, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            reader = _CountingReader(response.raw)
+            for kind, value in iter_feed(reader, documents_dir, base_url, categories):
+                if kind == 'total':
+                    total = value
+                    continue
+                page += 1
+                if cutoff and value.published and value.published < cutoff:
+                    reached_cutoff = True
+                    break
+                articles.append(value)
+        metrics.add('bytes_downloaded', reader.bytes_read, kind='listing')
+        logging.info(f"arXiv API page at {start}: {page} entries (total {total})")
+        if reached_cutoff or page == 0:
+            break
+        start += page
+
+    return merge_listings([articles])
@@ -0,0 +1,186 @@
+# batchSummaries.py
+import json
+import logging
+import os
+import random
+import time
+from typing import Dict, List, Optional
+
+from contentSelection import select_content
+from createSummaries import MAX_SUMMARY_TOKENS, SYSTEM_PROMPT, summary_cache_key
+from getDocuments import Article
+from llmBackends import LLMBackend, OpenAIBackend
+from pdfExtract import default_max_chars, default_max_pages, extract_texts
+from runMetrics import metrics
+from summaryCache import SummaryCache
+
+FINAL_STATUSES = {'completed', 'failed', 'expired', 'cancelled'}
+
+class BatchState:
+    """Submitted batch details persisted to disk so a restarted run resumes polling"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('BATCH_STATE_PATH', 'batch_state.json')
+
+    def load(self) -> Optional[dict]:
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable batch state {self.path}: {e}")
+            return None
+
+    def save(self, state: dict) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+def write_batch_file(articles: List[Article], texts: Dict[str, str], backend: OpenAIBackend,
+                     path: str) -> List[str]:
+    """Writes one /v1/chat/completions request per article with text; returns the custom ids written"""
+    custom_ids = []
+    with open(path, "w", encoding="utf-8") as f:
+        for article in articles:
+            pdf_text = texts.get(article.article_id, "")
+            if not pdf_text:
+                continue
+            pdf_text = select_content(pdf_text, backend.input_token_budget)
+            messages = backend.build_messages(SYSTEM_PROMPT, article.title, pdf_text)
+            f.write(json.dumps({
+                "custom_id": article.article_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": backend.chat_body(messages, MAX_SUMMARY_TOKENS)
+            }) + "\n")
+            custom_ids.append(article.article_id)
+    return custom_ids
+
+def submit_batch(backend: OpenAIBackend, path: str) -> str:
+    with open(path, "rb") as f:
+        input_file = backend.client.files.create(file=f, purpose="batch")
+    batch = backend.client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logging.info(f"Submitted batch {batch.id} with input file {input_file.id}")
+    return batch.id
+
+def poll_batch(backend: OpenAIBackend, batch_id: str, timeout: Optional[float] = None,
+               interval: Optional[float] = None, max_interval: float = 300.0):
+    """Polls until the batch reaches a final status, backing off exponentially with jitter"""
+    if timeout is None:
+        timeout = float(os.getenv('BATCH_POLL_TIMEOUT', '86400'))
+    if interval is None:
+        interval = float(os.getenv('BATCH_POLL_INTERVAL', '10'))
+    deadline = time.monotonic() + timeout
+    while True:
+        batch = backend.client.batches.retrieve(batch_id)
+        counts = getattr(batch, 'request_counts', None)
+        logging.info(f"Batch {batch_id} is {batch.status}"
+                     + (f" ({counts.completed}/{counts.total} done)" if counts else ""))
+        if batch.status in FINAL_STATUSES:
+            return batch
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Batch {batch_id} still {batch.status}; re-run to resume polling")
+        time.sleep(min(remaining, interval * random.uniform(0.8, 1.2)))
+        interval = min(max_interval, interval * 2)
+
+def read_batch_results(backend: OpenAIBackend, batch) -> Dict[str, str]:
+    """Maps custom ids to summary text from the batch output file; failed requests are logged"""
+    results = {}
+    if batch.output_file_id:
+        for line in backend.client.files.content(batch.output_file_id).text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            response = record.get("response") or {}
+            if record.get("error") or response.get("status_code") != 200:
+                logging.error(f"Batch request {record.get('custom_id')} failed: "
+                              f"{record.get('error') or response.get('status_code')}")
+                continue
+            usage = response["body"].get("usage") or {}
+            backend.record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+            results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+    if getattr(batch, 'error_file_id', None):
+        logging.warning(f"Batch {batch.id} reported errors in file {batch.error_file_id}")
+    return results
+
+def create_batch_summaries(articles: List[Article], backend: LLMBackend, use_cache: bool = True,
+                           state: Optional[BatchState] = None,
+                           batch_path: Optional[str] = None) -> List[Article]:
+    """Summarizes articles through the Batch API, resuming a previously submitted batch if one is pending.
+
+    Raises TimeoutError if the batch is not finished within BATCH_POLL_TIMEOUT;
+    the state file is kept so the next run picks up the same batch.
+    """
+    if not isinstance(backend, OpenAIBackend):
+        raise ValueError(f"Batch mode requires an OpenAI-compatible backend, not '{backend.name}'")
+    state = state or BatchState()
+    batch_path = batch_path or os.getenv('BATCH_FILE_PATH', 'batch_requests.jsonl')
+    cache = SummaryCache() if use_cache else None
+
+    try:
+        cache_keys = {}
+        pending = []
+        for article in articles:
+            if article.skipped:
+                continue
+            if not os.path.exists(article.pdf_content):
+                logging.error(f"PDF not found: {article.pdf_content}")
+                continue
+            if cache:
+                cache_key = summary_cache_key(article, backend)
+                cached_summary = cache.get(cache_key)
+                if cached_summary:
+                    article.summary = cached_summary
+                    logging.info(f"Using cached summary for: {article.title}")
+                    continue
+                cache_keys[article.article_id] = cache_key
+            pending.append(article)
+        if not pending:
+            return articles
+
+        pending_ids = {article.article_id for article in pending}
+        saved = state.load()
+        if (saved and saved.get("backend") == backend.name and saved.get("model") == backend.model
+                and pending_ids <= set(saved.get("custom_ids", [])) | set(saved.get("skipped_ids", []))):
+            batch_id = saved["batch_id"]
+            logging.info(f"Resuming batch {batch_id}")
+        else:
+            texts = extract_texts(
+                [(article.article_id, article.pdf_content) for article in pending],
+                max_chars=default_max_chars(),
+                max_pages=default_max_pages()
+            )
+            custom_ids = write_batch_file(pending, texts, backend, batch_path)
+            if not custom_ids:
+                return articles
+            batch_id = submit_batch(backend, batch_path)
+            # Papers with no extractable text are recorded too, so they do not block a resume
+            state.save({"batch_id": batch_id, "backend": backend.name, "model": backend.model,
+                        "custom_ids": custom_ids, "skipped_ids": sorted(pending_ids - set(custom_ids)),
+                        "submitted": time.time()})
+
+        with metrics.timed('batch_wait', backend=backend.name):
+            batch = poll_batch(backend, batch_id)
+        results = read_batch_results(backend, batch)
+        for article in pending:
+            article.summary = results.get(article.article_id, "")
+            article.summarized_by = backend.name if article.summary else ""
+            if cache and article.summary:
+                cache.put(cache_keys[article.article_id], article.article_id, article.summary)
+        logging.info(f"Batch {batch_id} {batch.status}: {len(results)} of {len(pending)} summaries")
+        state.clear()
+        return articles
+    finally:
+        if cache:
+            cache.close()
@@ -0,0 +1,115 @@
+# arxivFixtures.py
+"""Synthetic arXiv listing pages and Atom API feeds in the markup arxiv.org serves"""
+import random
+import textwrap
+from datetime import datetime, timedelta, timezone
+from html import escape
+from typing import Dict, List, Sequence
+
+from samplePdfs import WORDS
+
+def make_papers(count: int, categories: Sequence[str] = ("cs.AI",), cross_list: float = 0.0,
+                seed: int = 0) -> List[Dict]:
+    """Papers "Sample Paper <i>", newest first; the first cross_list fraction is in every category"""
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 2, 19, 0, tzinfo=timezone.utc)
+    shared = int(count * cross_list)
+    papers = []
+    for i in range(count):
+        own = categories[i % len(categories)]
+        papers.append({
+            "id": f"2401.{i:05d}",
+            "version": 1 + i % 3,
+            "title": f"Sample Paper {i}",
+            "authors": [f"Author {rng.choice('ABCDEFGH')}. Name{rng.randrange(1000)}" for _ in range(1 + i % 4)],
+            "abstract": " ".join(" ".join(rng.choice(WORDS) for _ in range(14)).capitalize() + "."
+                                 for _ in range(6)),
+            "categories": [own] + [c for c in categories if c != own] if i < shared else [own],
+            "published": (now - timedelta(minutes=7 * i)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        })
+    return papers
+
+def render_listing(papers: List[Dict], category: str = "cs.AI") -> str:
+    """A /list/<category>/new page with abstracts, as arXiv renders it"""
+    entries = []
+    for n, paper in enumerate(papers, start=1):
+        authors = ",\n".join(f'<a href="https://arxiv.org/a/{escape(name.split()[-1])}">{escape(name)}</a>'
+                             for name in paper["authors"])
+        subjects = "; ".join(paper["categories"])
+        entries.append(f"""<dt>
+        <a name='item{n}'>[{n}]</a>
+        <a href ="/abs/{paper['id']}" title="Abstract" id="{paper['id']}">
+          arXiv:{paper['id']}
+        </a>
+        [<a href="/pdf/{paper['id']}" title="Download PDF" id="pdf-{paper['id']}" aria-labelledby="pdf-{paper['id']}">pdf</a>,
+         <a href="https://arxiv.org/html/{paper['id']}v{paper['version']}" title="View HTML">html</a>, <a href="/format/{paper['id']}" title="Other formats">other</a>]
+      </dt>
+      <dd>
+        <div class='meta'>
+          <div class='list-title mathjax'><span class='descriptor'>Title:</span>
+            {escape(paper['title'])}
+          </div>
+          <div class='list-authors'>{authors}</div>
+          <div class='list-comments mathjax'><span class='descriptor'>Comments:</span> 12 pages, 4 figures</div>
+          <div class='list-subjects'><span class='descriptor'>Subjects:</span>
+            <span class="primary-subject">{escape(subjects)}</span></div>
+          <p class='mathjax'>
+            {escape(paper['abstract'])}
+          </p>
+        </div>
+      </dd>""")
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head><title>{category} new submissions</title>
+<link rel="stylesheet" type="text/css" media="screen" href="/static/browse/0.3.4/css/arXiv.css" />
+<script src="/static/browse/0.3.4/js/mathjaxToggle.min.js" type="text/javascript"></script>
+</head>
+<body class="with-cu-identity">
+<div id="header"><h1><a href="/">arXiv</a> &gt; <a href="/list/{category}/recent">{category}</a></h1>
+<form class="search" action="https://arxiv.org/search" method="get"><input name="query" type="text"/></form></div>
+<div id="content"><div id='dlpage'>
+<h1>Artificial Intelligence</h1>
+<h3>New submissions (showing {len(papers)} of {len(papers)} entries)</h3>
+<dl id='articles'>
+{"".join(entries)}
+</dl>
+</div></div>
+<footer><ul><li><a href="https://info.arxiv.org/help/contact.html">Contact</a></li></ul></footer>
+</body>
+</html>"""
+
+def render_atom(papers: List[Dict], total: int, start: int, query: str = "cat:cs.AI") -> str:
+    """One page of an export.arxiv.org/api/query response"""
+    entries = []
+    for paper in papers:
+        versioned = f"{paper['id']}v{paper['version']}"
+        authors = "".join(f"\n    <author>\n      <name>{escape(name)}</name>\n    </author>"
+                          for name in paper["authors"])
+        categories = "".join(f'\n    <category term="{c}" scheme="http://arxiv.org/schemas/atom"/>'
+                             for c in paper["categories"])
+        # The API hard-wraps titles and abstracts
+        abstract = textwrap.fill(paper["abstract"], 78)
+        entries.append(f"""
+  <entry>
+    <id>http://arxiv.org/abs/{versioned}</id>
+    <updated>{paper['published']}</updated>
+    <published>{paper['published']}</published>
+    <title>{escape(paper['title'])}</title>
+    <summary>  {escape(abstract)}
+</summary>{authors}
+    <arxiv:comment xmlns:arxiv="http://arxiv.org/schemas/atom">12 pages, 4 figures</arxiv:comment>
+    <link href="http://arxiv.org/abs/{versioned}" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/{versioned}" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="{paper['categories'][0]}" scheme="http://arxiv.org/schemas/atom"/>{categories}
+  </entry>""")
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <link href="http://arxiv.org/api/query?search_query={escape(query)}" rel="self" type="application/atom+xml"/>
+  <title type="html">ArXiv Query: search_query={escape(query)}</title>
+  <id>http://arxiv.org/api/standin</id>
+  <updated>2024-01-02T00:00:00-05:00</updated>
+  <opensearch:totalResults xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">{total}</opensearch:totalResults>
+  <opensearch:startIndex xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">{len(papers)}</opensearch:itemsPerPage>{"".join(entries)}
+</feed>
+"""
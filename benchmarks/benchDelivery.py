@@ -0,0 +1,120 @@
+# benchDelivery.py
+"""Benchmark: pooled multi-recipient delivery vs. one SMTP connection and login per message.
+
+Usage: python benchmarks/benchDelivery.py [--recipients 200] [--handshake 0.05] [--error-rate 0.05]
+
+Both runs send the same digests to a local SMTP sink that sleeps for the
+handshake on each new connection and answers error_rate of MAIL commands
+with 421. Half the recipients filter by category. A final re-run with the
+same journal checks that nobody is emailed twice.
+"""
+import argparse
+import os
+import smtplib
+import sys
+import tempfile
+import time
+from collections import Counter
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from createEmailSummary import email_title, iter_email_html
+from emailDelivery import Subscriber, SmtpPool, articles_for, deliver
+from getDocuments import Article
+from runJournal import RunJournal
+from standins import SmtpSink
+
+CATEGORIES = ("cs.AI", "cs.LG", "cs.CL", "stat.ML")
+
+def make_articles(count: int):
+    return [Article(title=f"Paper {i}", pdf_link=f"https://arxiv.org/pdf/2401.{i:05d}",
+                    abstract_link=f"https://arxiv.org/abs/2401.{i:05d}", article_id=f"2401.{i:05d}",
+                    pdf_content="", summary="A summary of the paper. " * 40,
+                    categories=[CATEGORIES[i % len(CATEGORIES)]])
+            for i in range(count)]
+
+def make_subscribers(count: int):
+    return [Subscriber(f"reader{i}@example.com",
+                       frozenset({CATEGORIES[i % len(CATEGORIES)]}) if i % 2 else frozenset())
+            for i in range(count)]
+
+def legacy_send(sink: SmtpSink, articles, subscribers, retries: int) -> int:
+    """The original send_email, called once per recipient: connect, log in, send, quit"""
+    sent = 0
+    for subscriber in subscribers:
+        msg = MIMEMultipart()
+        msg['Subject'] = "AI Papers Daily Summary"
+        msg['From'] = os.environ['SENDER_EMAIL']
+        msg['To'] = subscriber.address
+        msg.attach(MIMEText("".join(iter_email_html(articles_for(subscriber, articles), email_title())), 'html'))
+        for attempt in range(retries + 1):
+            try:
+                with smtplib.SMTP("127.0.0.1", sink.port) as server:
+                    server.login(os.environ['SENDER_EMAIL'], os.environ['SENDER_PASSWORD'])
+                    server.send_message(msg)
+                sent += 1
+                break
+            except (smtplib.SMTPException, OSError):
+                if attempt == retries:
+                    raise
+    return sent
+
+def summarize(label: str, sink: SmtpSink, seconds: float, subscribers) -> None:
+    received = Counter(address for message in sink.messages for address in message["to"])
+    duplicates = sum(count - 1 for count in received.values())
+    missing = sum(1 for subscriber in subscribers if subscriber.address not in received)
+    print(f"{label:<22} {seconds:>8.2f} {len(sink.messages):>6} {sink.connections:>6} {sink.rejected:>6} "
+          f"{duplicates:>5} {missing:>5}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipients', type=int, default=200)
+    parser.add_argument('--papers', type=int, default=50)
+    parser.add_argument('--handshake', type=float, default=0.05, help='Seconds per new SMTP connection')
+    parser.add_argument('--error-rate', type=float, default=0.05, help='Fraction of MAIL commands answered 421')
+    parser.add_argument('--connections', type=int, default=4, help='SMTP_MAX_CONNECTIONS for the pooled run')
+    args = parser.parse_args()
+
+    os.environ.update({"SENDER_EMAIL": "bench@example.com", "SENDER_PASSWORD": "standin"})
+    articles = make_articles(args.papers)
+    subscribers = make_subscribers(args.recipients)
+    print(f"{args.recipients} recipients, {args.papers} papers, {args.handshake * 1000:.0f} ms handshake, "
+          f"{args.error_rate:.0%} 421s")
+    print(f"{'':<22} {'seconds':>8} {'sent':>6} {'conns':>6} {'421s':>6} {'dupes':>5} {'lost':>5}")
+
+    sink = SmtpSink(args.handshake, args.error_rate).start()
+    try:
+        start = time.perf_counter()
+        legacy_send(sink, articles, subscribers, retries=3)
+        summarize("connection per message", sink, time.perf_counter() - start, subscribers)
+    finally:
+        sink.stop()
+
+    sink = SmtpSink(args.handshake, args.error_rate).start()
+    journal_path = os.path.join(tempfile.mkdtemp(prefix="bench-delivery-"), "run_journal.jsonl")
+    try:
+        def pool():
+            return SmtpPool("127.0.0.1", sink.port, use_ssl=False, max_connections=args.connections)
+
+        journal = RunJournal(journal_path)
+        start = time.perf_counter()
+        deliver(articles, subscribers, journal, pool=pool(), base_delay=0.05)
+        summarize("pooled", sink, time.perf_counter() - start, subscribers)
+        journal.close()
+
+        # Same day, same journal: a retried run must not email anyone again
+        journal = RunJournal(journal_path)
+        start = time.perf_counter()
+        resent = deliver(articles, subscribers, journal, pool=pool(), base_delay=0.05)
+        journal.close()
+        print(f"{'re-run with journal':<22} {time.perf_counter() - start:>8.2f} {resent:>6}")
+        summarize("pooled + re-run", sink, 0.0, subscribers)
+    finally:
+        sink.stop()
+
+if __name__ == "__main__":
+    main()
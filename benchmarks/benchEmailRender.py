@@ -0,0 +1,72 @@
+# benchEmailRender.py
+"""Benchmark: streaming email renderer vs. the original += concatenation.
+
+Usage: python benchmarks/benchEmailRender.py [--sizes 1000,2000,5000,10000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from createEmailSummary import create_email_summary
+from getDocuments import Article
+
+def legacy_create_email_summary(articles, output_path):
+    """Original createEmailSummary.create_email_summary body (header omitted)"""
+    html_content = "<html><body>"
+    for article in articles:
+        pdf_link_html = f'<a href="{article.pdf_link}">PDF</a>' if article.pdf_link else ''
+        abstract_link_html = f'<a href="{article.abstract_link}">Abstract</a>' if article.abstract_link else ''
+        html_content += f"""
+        <div class="article">
+            <div class="title">{article.title}</div>
+            <div class="links">
+                {pdf_link_html}
+                {abstract_link_html}
+            </div>
+            <div class="summary">
+                <p>{article.summary}</p>
+            </div>
+        </div>
+        """
+    html_content += "</body></html>"
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(html_content)
+    return html_content
+
+def make_articles(count):
+    summary = "This paper proposes a <novel> method & evaluates it on several benchmarks. " * 12
+    return [
+        Article(title=f"Paper {i}: Scaling \"Things\" & <Stuff>",
+                pdf_link=f"https://arxiv.org/pdf/2401.{i:05d}",
+                abstract_link=f"https://arxiv.org/abs/2401.{i:05d}",
+                article_id=f"2401.{i:05d}", pdf_content="", summary=summary)
+        for i in range(count)
+    ]
+
+def best_of(fn, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,2000,5000,10000')
+    args = parser.parse_args()
+
+    output_path = os.path.join(tempfile.gettempdir(), "bench-email.html")
+    print(f"{'articles':>8} {'legacy us/article':>18} {'streaming us/article':>21}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        articles = make_articles(size)
+        legacy = best_of(lambda: legacy_create_email_summary(articles, output_path))
+        streaming = best_of(lambda: create_email_summary(articles, output_path=output_path))
+        print(f"{size:>8} {legacy / size * 1e6:>18.2f} {streaming / size * 1e6:>21.2f}")
+
+if __name__ == "__main__":
+    main()
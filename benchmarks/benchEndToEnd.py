@@ -0,0 +1,165 @@
+# benchEndToEnd.py
+"""Offline end-to-end benchmark: drives main.py against local arXiv, LLM and SMTP stand-ins.
+
+Usage: python benchmarks/benchEndToEnd.py [--sizes 10,100,1000] [--llm ollama]
+           [--llm-latency 0.5] [--error-rate 0.05] [--pdf-latency 0.05] [--json report.json]
+
+Per-paper stage latencies are reconstructed from what the stand-ins observed:
+  download  first listing/API page served -> PDF served
+  extract   PDF served -> first LLM request for that paper (extraction plus queueing)
+  llm       first LLM request received -> last LLM response sent (includes 429 retries)
+  deliver   last LLM response of the run -> email received by the SMTP sink
+With --batch there are no per-paper chat calls, so only download timings are reported.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from standins import FakeArxiv, FakeLLM, SmtpSink
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def run_once(size: int, args) -> Dict:
+    categories = args.categories.split(',')
+    arxiv = FakeArxiv(size, pages=args.pdf_pages, latency=args.pdf_latency,
+                      categories=categories, cross_list=args.cross_list).start()
+    llm = FakeLLM(latency=args.llm_latency, error_rate=args.error_rate, retry_after=args.retry_after).start()
+    smtp = SmtpSink().start()
+    workdir = tempfile.mkdtemp(prefix=f"bench-e2e-{size}-")
+
+    env = dict(os.environ)
+    env.update({
+        "ARXIV_URL": ",".join(f"{arxiv.url}/list/{category}/new" for category in categories),
+        "ARXIV_BASE_URL": arxiv.url,
+        "ARXIV_API_URL": f"{arxiv.url}/api/query",
+        "ARXIV_API_DELAY": "0",
+        "ARXIV_SOURCE": args.source,
+        "OLLAMA_API_URL": f"{llm.url}/api/chat",
+        "LM_STUDIO_API_URL": f"{llm.url}/v1",
+        "OPENAI_BASE_URL": f"{llm.url}/v1",
+        "OPENAI_API_KEY": "standin",
+        "FUELIX_API_URL": f"{llm.url}/v1",
+        "FUELIX_API_KEY": "standin",
+        "SMTP_HOST": "127.0.0.1",
+        "SMTP_PORT": str(smtp.port),
+        "SMTP_SSL": "false",
+        "SENDER_EMAIL": "bench@example.com",
+        "SENDER_PASSWORD": "standin",
+        "RECEIVER_EMAIL": "readers@example.com",
+        "DOWNLOAD_HOST_DELAY": str(args.host_delay),
+        "SUMMARY_CACHE_PATH": os.path.join(workdir, "summary_cache.sqlite3"),
+        "RUN_JOURNAL_PATH": os.path.join(workdir, "run_journal.jsonl"),
+        "METRICS_REPORT_PATH": os.path.join(workdir, "metrics_report.json"),
+        "BATCH_POLL_INTERVAL": "0.2",
+    })
+    command = [sys.executable, os.path.join(REPO_DIR, "main.py"), "--llm", args.llm,
+               "--documents", os.path.join(workdir, "documents"),
+               "--output", os.path.join(workdir, "finalSummary.html"), "--no-cache", "--no-resume"]
+    if args.batch:
+        command.append("--batch")
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    start = time.time()
+    result = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    elapsed = time.time() - start
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    try:
+        if result.returncode != 0:
+            sys.stderr.write(result.stderr[-4000:])
+            raise RuntimeError(f"main.py exited with {result.returncode} for {size} papers")
+        if not smtp.messages:
+            sys.stderr.write(result.stderr[-4000:])
+            raise RuntimeError(f"main.py sent no email for {size} papers")
+
+        download, extract, llm_latency = [], [], []
+        last_llm = 0.0
+        for article_id, title in arxiv.titles.items():
+            served = arxiv.pdf_served.get(article_id)
+            calls = llm.calls.get(title)
+            if served:
+                download.append(served - arxiv.listing_served)
+            if served and calls:
+                extract.append(calls[0][0] - served)
+                llm_latency.append(calls[-1][1] - calls[0][0])
+                last_llm = max(last_llm, calls[-1][1])
+        deliver = [message["received"] - last_llm for message in smtp.messages] if last_llm else []
+        with open(os.path.join(workdir, "metrics_report.json"), encoding="utf-8") as f:
+            run_metrics = json.load(f)
+
+        return {
+            "papers": size,
+            # Anything above 1 means a paper was fetched more than once across listings
+            "max_pdf_fetches": max(arxiv.pdf_requests.values(), default=0),
+            "summarized": len(llm.calls),
+            "emails": len(smtp.messages),
+            "seconds": elapsed,
+            "papers_per_sec": size / elapsed,
+            "llm_requests": llm.requests,
+            "llm_429s": llm.throttled,
+            # ru_maxrss covers the largest single child process (main.py or an extraction worker)
+            "peak_rss_mb": max(peak_rss_kb, before) / 1024,
+            "stages": {
+                name: {"p50": percentile(values, 50), "p90": percentile(values, 90), "p99": percentile(values, 99)}
+                for name, values in (("download", download), ("extract", extract),
+                                     ("llm", llm_latency), ("deliver", deliver))
+            },
+            # The app's own report: stage timings from inside the process plus byte and token counters
+            "run_metrics": run_metrics,
+        }
+    finally:
+        arxiv.stop()
+        llm.stop()
+        smtp.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,1000', help='Comma-separated paper counts')
+    parser.add_argument('--llm', choices=['local', 'fuelix', 'openai', 'ollama'], default='ollama')
+    parser.add_argument('--batch', action='store_true', help='Run main.py with --batch (openai/fuelix)')
+    parser.add_argument('--llm-latency', type=float, default=0.2, help='Mean seconds per completion')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of chat calls answered with 429')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with 429s')
+    parser.add_argument('--pdf-latency', type=float, default=0.0, help='Seconds before each PDF response')
+    parser.add_argument('--categories', default='cs.AI', help='Comma-separated listings served by the fake arXiv')
+    parser.add_argument('--source', choices=['api', 'listing'], default='listing', help='ARXIV_SOURCE for the run')
+    parser.add_argument('--cross-list', type=float, default=0.0,
+                        help='Fraction of papers cross-listed in every category')
+    parser.add_argument('--pdf-pages', type=int, default=8, help='Pages per generated PDF')
+    parser.add_argument('--host-delay', type=float, default=0.0, help='DOWNLOAD_HOST_DELAY for the run')
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args()
+
+    reports = [run_once(int(size), args) for size in args.sizes.split(',')]
+
+    print(f"{'papers':>7} {'secs':>8} {'papers/s':>9} {'429s':>5} {'RSS MB':>7}  "
+          f"{'stage':<9}{'p50':>8}{'p90':>8}{'p99':>8}")
+    for report in reports:
+        first = True
+        for stage, stats in report["stages"].items():
+            prefix = (f"{report['papers']:>7} {report['seconds']:>8.2f} {report['papers_per_sec']:>9.2f} "
+                      f"{report['llm_429s']:>5} {report['peak_rss_mb']:>7.1f}  ") if first else " " * 42
+            print(f"{prefix}{stage:<9}{stats['p50']:>8.3f}{stats['p90']:>8.3f}{stats['p99']:>8.3f}")
+            first = False
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+if __name__ == "__main__":
+    main()
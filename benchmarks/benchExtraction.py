@@ -0,0 +1,73 @@
+# benchExtraction.py
+"""Micro-benchmark: early-exit extraction vs. the original full-document extractors.
+
+Usage: python benchmarks/benchExtraction.py [pdf_folder] [--pages N] [--count N]
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdfplumber
+import PyPDF2
+
+from pdfExtract import extract_text
+from samplePdfs import write_sample_pdfs
+
+def legacy_pypdf2(pdf_path: str) -> str:
+    """Original createSummaries.extract_pdf_text"""
+    text = ""
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page in reader.pages:
+            text += page.extract_text() or ""
+    return text[:4000]
+
+def legacy_pdfplumber(pdf_path: str) -> str:
+    """Original extraction loop of getDocuments.extract_pdf_content"""
+    text_content = ""
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages:
+            text_content += page.extract_text() or ""
+    return text_content.strip()
+
+def time_it(fn, paths):
+    start = time.perf_counter()
+    for path in paths:
+        fn(path)
+    return (time.perf_counter() - start) / len(paths) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('folder', nargs='?', help='Folder of PDFs (default: generated samples)')
+    parser.add_argument('--pages', type=int, default=40, help='Pages per generated sample')
+    parser.add_argument('--count', type=int, default=10, help='Number of generated samples')
+    args = parser.parse_args()
+
+    if args.folder:
+        paths = sorted(glob.glob(os.path.join(args.folder, "*.pdf")))
+    else:
+        folder = os.path.join(tempfile.gettempdir(), f"bench-extract-{args.pages}p")
+        paths = write_sample_pdfs(folder, args.count, pages=args.pages)
+
+    cases = [
+        ("pypdf2 legacy (full doc, +=)", legacy_pypdf2),
+        ("pypdf2 early exit 4000 chars", lambda p: extract_text(p, max_chars=4000, extractor='pypdf2')),
+        ("pdfplumber legacy (full doc, +=)", legacy_pdfplumber),
+        ("pdfplumber early exit 4000 chars", lambda p: extract_text(p, max_chars=4000, extractor='pdfplumber')),
+        ("pdfplumber first 2 pages", lambda p: extract_text(p, max_pages=2, extractor='pdfplumber')),
+    ]
+    print(f"{len(paths)} PDFs")
+    for name, fn in cases:
+        print(f"{name:<36} {time_it(fn, paths):8.1f} ms/PDF")
+
+    # The early-exit path must return what the old PyPDF2 function kept
+    for path in paths:
+        assert legacy_pypdf2(path) == extract_text(path, max_chars=4000, extractor='pypdf2'), path
+
+if __name__ == "__main__":
+    main()
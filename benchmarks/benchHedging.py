@@ -0,0 +1,95 @@
+# benchHedging.py
+"""Benchmark: per-summary latency with a hedged fallback backend vs. the primary backend alone.
+
+Usage: python benchmarks/benchHedging.py [--papers 200] [--latency 0.2] [--tail-rate 0.05]
+           [--tail-latency 5] [--fallback-latency 0.4] [--deadline 3]
+
+The primary is an Ollama stand-in where tail_rate of calls stall for
+tail_latency seconds; the fallback is a slower but steady LM Studio
+(OpenAI-compatible) stand-in. Each run sends the same papers through the summary scheduler and
+reports per-summary percentiles, which backend wrote each summary, and how
+many requests the fallback received.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from benchEndToEnd import percentile
+from llmBackends import create_backend_chain
+from runMetrics import metrics
+from standins import FakeLLM
+from summaryScheduler import SummaryScheduler
+
+def run(label: str, fallbacks, papers: int, args) -> None:
+    primary = FakeLLM(latency=args.latency, tail_rate=args.tail_rate, tail_latency=args.tail_latency).start()
+    fallback = FakeLLM(latency=args.fallback_latency, seed=1).start()
+    os.environ.update({
+        "OLLAMA_API_URL": f"{primary.url}/api/chat",
+        "LM_STUDIO_API_URL": f"{fallback.url}/v1",
+        "LLM_CALL_DEADLINE": str(args.deadline),
+    })
+    metrics.reset()
+    backend = create_backend_chain('ollama', fallbacks, pool_size=args.in_flight)
+    if fallbacks:
+        backend.hedge_after = args.hedge_after
+        backend.min_samples = args.min_samples
+    scheduler = SummaryScheduler(max_in_flight=args.in_flight, max_retries=3, base_delay=0.05)
+    sources = Counter()
+
+    def summarize(i: int) -> float:
+        start = time.perf_counter()
+        try:
+            summary, source = scheduler.run(
+                lambda: backend.summarize_attributed("Summarize.", f"Paper {i}", "Text. " * 200))
+            sources[source if summary else "empty"] += 1
+        except Exception as e:
+            sources[type(e).__name__] += 1
+        return time.perf_counter() - start
+
+    try:
+        start = time.perf_counter()
+        seconds = scheduler.map(summarize, range(papers))
+        elapsed = time.perf_counter() - start
+    finally:
+        backend.close()
+        primary.stop()
+        fallback.stop()
+    counters = metrics.report()["counters"]
+    hedges = sum(counter["value"] for counter in counters if counter["name"] == "llm_hedges")
+    deadlines = sum(counter["value"] for counter in counters if counter["name"] == "llm_deadlines_exceeded")
+    print(f"{label:<22} {elapsed:>8.1f} {percentile(seconds, 50):>7.2f} {percentile(seconds, 90):>7.2f} "
+          f"{percentile(seconds, 99):>7.2f} {max(seconds):>7.2f} {hedges:>7.0f} {deadlines:>6.0f} "
+          f"{fallback.requests:>9}  {dict(sources)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--papers', type=int, default=200)
+    parser.add_argument('--in-flight', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.2, help='Primary mean seconds per call')
+    parser.add_argument('--tail-rate', type=float, default=0.05, help='Fraction of primary calls that stall')
+    parser.add_argument('--tail-latency', type=float, default=5.0, help='Seconds a stalled call takes')
+    parser.add_argument('--fallback-latency', type=float, default=0.4)
+    parser.add_argument('--deadline', type=float, default=3.0, help='LLM_CALL_DEADLINE for both runs')
+    parser.add_argument('--hedge-after', type=float, default=1.0, help='LLM_HEDGE_AFTER for the hedged run')
+    parser.add_argument('--min-samples', type=int, default=20, help='LLM_HEDGE_MIN_SAMPLES for the hedged run')
+    args = parser.parse_args()
+    # Retries and hedges are counted in the table rather than logged
+    logging.disable(logging.WARNING)
+
+    print(f"{args.papers} papers, {args.in_flight} in flight, primary {args.latency:g}s with "
+          f"{args.tail_rate:.0%} stalling {args.tail_latency:g}s, fallback {args.fallback_latency:g}s, "
+          f"deadline {args.deadline:g}s")
+    print(f"{'':<22} {'seconds':>8} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7} {'hedges':>7} "
+          f"{'dlines':>6} {'fallback':>9}  summaries by")
+    run("primary only", [], args.papers, args)
+    run("hedged to fallback", ["local"], args.papers, args)
+
+if __name__ == "__main__":
+    main()
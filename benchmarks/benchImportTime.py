@@ -0,0 +1,68 @@
+# benchImportTime.py
+"""Cold-start check: import time of main.py and which heavy modules it pulls in.
+
+Usage: python benchmarks/benchImportTime.py [--repeat 5] [--top 10] [--budget-ms 0]
+
+Each scenario runs in a fresh interpreter under `python -X importtime`. The
+script exits non-zero if a scenario imports a module it should leave to a
+later code path, or if --budget-ms is set and the median import of main is
+slower than that.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules only specific --llm, --batch or ingestion paths need
+DEFERRED = ('bs4', 'openai', 'PyPDF2', 'pdfplumber', 'numpy', 'smtplib', 'batchSummaries')
+
+SCENARIOS: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("import main (cloud_function)", "import main", DEFERRED),
+    ("main + --llm ollama backend", "import main; main.create_backend('ollama')", DEFERRED),
+]
+
+def import_times(code: str) -> Dict[str, Tuple[int, int]]:
+    """Runs code under -X importtime and returns {module: (self_us, cumulative_us)}"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=REPO_DIR,
+                            capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    if result.returncode:
+        raise RuntimeError(f"{code!r} failed:\n{result.stderr[-2000:]}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        times[name] = (int(self_us), int(cumulative_us))
+    return times
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Slowest modules listed per scenario')
+    parser.add_argument('--budget-ms', type=float, default=0, help='Fail if main imports slower than this (0 = off)')
+    args = parser.parse_args()
+
+    failures = []
+    for label, code, deferred in SCENARIOS:
+        runs = [import_times(code) for _ in range(args.repeat)]
+        median_ms = statistics.median(run["main"][1] for run in runs) / 1000
+        print(f"{label}: main imports in {median_ms:.1f} ms (median of {args.repeat})")
+        last = runs[-1]
+        for name, (self_us, cumulative_us) in sorted(last.items(), key=lambda item: -item[1][0])[:args.top]:
+            print(f"    {self_us / 1000:>7.1f} ms self {cumulative_us / 1000:>8.1f} ms total  {name}")
+        loaded = [name for name in deferred if name in last]
+        if loaded:
+            failures.append(f"{label}: imported {', '.join(loaded)}")
+        if args.budget_ms and median_ms > args.budget_ms:
+            failures.append(f"{label}: {median_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchListingParse.py
+"""Compares the HTML listing parser with the streaming Atom API parser on the same papers.
+
+Usage: python benchmarks/benchListingParse.py [--sizes 100,500,2000] [--repeat 5]
+       python benchmarks/benchListingParse.py --listing saved/new.html --atom saved/query.xml
+
+With --listing/--atom, saved arxiv.org pages are parsed instead of generated
+fixtures; --save DIR writes the generated fixtures out for inspection.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from arxivApi import iter_feed
+from arxivFixtures import make_papers, render_atom, render_listing
+from getDocuments import Article, parse_listing
+
+def parse_atom(data: bytes) -> List[Article]:
+    return [value for kind, value in iter_feed(io.BytesIO(data)) if kind == 'article']
+
+def measure(parse: Callable[[], List[Article]], repeat: int) -> Tuple[List[Article], float, float]:
+    """Returns the parsed articles, best wall time in seconds and peak traced memory in MiB"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        articles = parse()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    parse()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return articles, best, peak / (1 << 20)
+
+def agreement(listing: List[Article], atom: List[Article]) -> str:
+    by_id = {article.article_id: article for article in atom}
+    common = [article for article in listing if article.article_id in by_id]
+    fields = ("title", "authors", "abstract")
+    mismatched = {field: sum(getattr(article, field) != getattr(by_id[article.article_id], field)
+                             for article in common) for field in fields}
+    return (f"{len(common)}/{max(len(listing), len(atom))} ids shared; mismatches "
+            + ", ".join(f"{field}={count}" for field, count in mismatched.items()))
+
+def compare(label: str, html: str, atom: bytes, repeat: int) -> None:
+    listing_articles, listing_time, listing_peak = measure(lambda: parse_listing(html), repeat)
+    atom_articles, atom_time, atom_peak = measure(lambda: parse_atom(atom), repeat)
+    count = max(len(listing_articles), len(atom_articles), 1)
+    print(f"{label:>8}  {'listing':<8} {listing_time * 1000:>9.1f} {listing_time / count * 1e6:>9.1f} "
+          f"{listing_peak:>8.1f} {len(html) / (1 << 10):>9.0f}")
+    print(f"{'':>8}  {'atom':<8} {atom_time * 1000:>9.1f} {atom_time / count * 1e6:>9.1f} "
+          f"{atom_peak:>8.1f} {len(atom) / (1 << 10):>9.0f}")
+    print(f"{'':>8}  {agreement(listing_articles, atom_articles)}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,500,2000', help='Comma-separated entry counts for generated fixtures')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--listing', help='Saved /list/<category>/new page')
+    parser.add_argument('--atom', help='Saved export.arxiv.org/api/query response')
+    parser.add_argument('--save', help='Directory to write the generated fixtures to')
+    args = parser.parse_args()
+
+    print(f"{'entries':>8}  {'parser':<8} {'ms':>9} {'us/entry':>9} {'peak MiB':>8} {'input KiB':>9}")
+    if args.listing or args.atom:
+        if not (args.listing and args.atom):
+            parser.error("--listing and --atom are compared together")
+        with open(args.listing, encoding="utf-8") as f:
+            html = f.read()
+        with open(args.atom, "rb") as f:
+            atom = f.read()
+        compare("saved", html, atom, args.repeat)
+        return
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        papers = make_papers(size)
+        html = render_listing(papers)
+        atom = render_atom(papers, len(papers), 0).encode()
+        if args.save:
+            os.makedirs(args.save, exist_ok=True)
+            with open(os.path.join(args.save, f"listing-{size}.html"), "w", encoding="utf-8") as f:
+                f.write(html)
+            with open(os.path.join(args.save, f"atom-{size}.xml"), "wb") as f:
+                f.write(atom)
+        compare(str(size), html, atom, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchLocalLibrary.py
+"""Benchmark: manifest-backed --pdfs scanning on a nested library, cold and on re-runs.
+
+Usage: python benchmarks/benchLocalLibrary.py [--count 10000] [--pages 2] [--changed 100]
+
+Generated PDFs carry an /Info /Title and are spread over nested folders.
+After the cold scan every file is marked summarized, then the library is
+re-scanned unchanged, with files edited, touched (mtime only) and moved.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from pdfManifest import PdfManifest
+from samplePdfs import make_pdf
+
+def build_library(folder: str, count: int, pages: int) -> list:
+    paths = []
+    for i in range(count):
+        subfolder = os.path.join(folder, f"topic-{i % 10}", f"year-{2015 + i % 7}")
+        os.makedirs(subfolder, exist_ok=True)
+        path = os.path.join(subfolder, f"paper-{i:05d}.pdf")
+        with open(path, "wb") as f:
+            f.write(make_pdf(f"Library Paper {i}", pages=pages, seed=i, metadata=True))
+        paths.append(path)
+    return paths
+
+def timed_scan(label: str, manifest_path: str, folder: str, expected: int) -> list:
+    manifest = PdfManifest(manifest_path)
+    start = time.perf_counter()
+    articles = manifest.scan(folder)
+    elapsed = time.perf_counter() - start
+    for article in articles:
+        article.summary = "summary"
+    manifest.mark_processed(articles)
+    manifest.save()
+    status = "ok" if len(articles) == expected else f"expected {expected}"
+    print(f"{label:<28} {elapsed:>8.2f} {len(articles):>9} {status}")
+    return articles
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=10000)
+    parser.add_argument('--pages', type=int, default=2)
+    parser.add_argument('--changed', type=int, default=100, help='Files edited, touched and moved in the re-runs')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-library-")
+    folder = os.path.join(workdir, "library")
+    manifest_path = os.path.join(workdir, "pdf_manifest.json")
+    try:
+        start = time.perf_counter()
+        paths = build_library(folder, args.count, args.pages)
+        print(f"{args.count} PDFs written in {time.perf_counter() - start:.1f}s")
+        print(f"{'scan':<28} {'seconds':>8} {'returned':>9}")
+
+        articles = timed_scan("cold (every file new)", manifest_path, folder, args.count)
+        titled = sum(article.title.startswith("Library Paper") for article in articles)
+        print(f"{'':<28} {'':>8} {titled:>9} titled from metadata")
+        timed_scan("no change", manifest_path, folder, 0)
+
+        edited = paths[:args.changed]
+        for i, path in enumerate(edited):
+            with open(path, "wb") as f:
+                f.write(make_pdf(f"Library Paper {i} revised", pages=args.pages, seed=args.count + i, metadata=True))
+        timed_scan(f"{len(edited)} edited", manifest_path, folder, len(edited))
+
+        touched = paths[args.changed:2 * args.changed]
+        for path in touched:
+            os.utime(path, None)
+        timed_scan(f"{len(touched)} touched", manifest_path, folder, 0)
+
+        moved_dir = os.path.join(folder, "moved")
+        os.makedirs(moved_dir)
+        for path in paths[2 * args.changed:3 * args.changed]:
+            shutil.move(path, moved_dir)
+        timed_scan(f"{args.changed} moved", manifest_path, folder, 0)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchNearDuplicates.py
+"""Near-duplicate index lookup time and accuracy as the index grows.
+
+Usage: python benchmarks/benchNearDuplicates.py [--sizes 1000,10000,100000] [--queries 50]
+
+The index is filled with a set of generated papers indexed from their text,
+padded with random signatures up to each size. Each size is queried with
+revised copies of the indexed papers (a fraction of words replaced), which
+should match, and with unrelated papers, which should not. The LSH lookup is
+compared with a linear scan over every stored signature.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from nearDuplicates import NearDuplicateIndex
+
+def make_text(rng: random.Random, vocabulary, words: int) -> str:
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+def revise(rng: random.Random, text: str, vocabulary, rate: float) -> str:
+    """Replaces roughly rate of the words, as a revised version might"""
+    return " ".join(rng.choice(vocabulary) if rng.random() < rate else word for word in text.split())
+
+def linear_find(matrix, threshold: float, signature):
+    similarity = (matrix == signature).mean(axis=1)
+    best = int(similarity.argmax())
+    return best if similarity[best] >= threshold else None
+
+def timed_queries(find, signatures):
+    start = time.perf_counter()
+    results = [find(signature) for signature in signatures]
+    return results, (time.perf_counter() - start) / len(signatures)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000')
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('--words', type=int, default=3000, help='Words per generated paper')
+    parser.add_argument('--revision-rate', type=float, default=0.01, help='Fraction of words changed per revision')
+    parser.add_argument('--threshold', type=float, default=0.8)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(20000)]
+    path = os.path.join(tempfile.mkdtemp(), "bench-near-duplicates.sqlite3")
+    index = NearDuplicateIndex(path=path, threshold=args.threshold, max_entries=10 ** 9)
+    print(f"bands={index.bands} rows={index.rows} num_perm={index.num_perm} threshold={index.threshold}")
+
+    originals = [make_text(rng, vocabulary, args.words) for _ in range(args.queries)]
+    start = time.perf_counter()
+    original_signatures = [index.signature(text) for text in originals]
+    signature_ms = (time.perf_counter() - start) / len(originals) * 1000
+    print(f"signature: {signature_ms:.2f} ms per {args.words}-word paper")
+    index.add_many((f"orig-{i}", f"Paper {i}", "", "summary", signature, None)
+                   for i, signature in enumerate(original_signatures))
+    revised = [index.signature(revise(rng, text, vocabulary, args.revision_rate)) for text in originals]
+    unrelated = [index.signature(make_text(rng, vocabulary, args.words)) for _ in range(args.queries)]
+
+    np_rng = np.random.RandomState(0)
+    print(f"{'papers':>8} {'lsh ms':>8} {'scan ms':>8} {'found':>7} {'false+':>7} {'db MiB':>7}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        indexed = len(index)
+        for start in range(indexed, size, 10000):
+            count = min(10000, size - start)
+            filler = np_rng.randint(0, 2 ** 32, size=(count, index.num_perm), dtype=np.uint64).astype(np.uint32)
+            index.add_many((f"fill-{start + i}", "", "", "summary", signature, None)
+                           for i, signature in enumerate(filler))
+
+        found, lsh_time = timed_queries(index.find, revised)
+        false_hits, _ = timed_queries(index.find, unrelated)
+        with index._lock:
+            matrix = np.stack([np.frombuffer(row[0], dtype=np.uint32)
+                               for row in index._conn.execute("SELECT signature FROM papers")])
+        _, scan_time = timed_queries(lambda signature: linear_find(matrix, index.threshold, signature), revised)
+        hits = sum(match is not None and match["article_id"] == f"orig-{i}" for i, match in enumerate(found))
+        false_positives = sum(match is not None for match in false_hits)
+        print(f"{len(index):>8} {lsh_time * 1000:>8.2f} {scan_time * 1000:>8.2f} "
+              f"{hits:>3}/{len(revised):<3} {false_positives:>3}/{len(unrelated):<3} "
+              f"{os.path.getsize(path) / (1 << 20):>7.1f}")
+    index.close()
+
+if __name__ == "__main__":
+    main()
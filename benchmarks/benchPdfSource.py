@@ -0,0 +1,105 @@
+# benchPdfSource.py
+"""Benchmark: spooled in-memory downloads and memory-mapped cached PDFs vs. the original tempfile round-trip.
+
+Usage: python benchmarks/benchPdfSource.py [--count 10] [--pages 20] [--extractor pypdf2]
+
+PDFs are served by the local arXiv stand-in. Peak is the largest Python
+heap allocation traced while handling one paper; mapped file pages live in
+the OS page cache and are not counted, which is the point of mapping them.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+import pdfplumber
+import PyPDF2
+import requests
+
+from getDocuments import extract_pdf_content
+from pdfExtract import extract_text
+from standins import FakeArxiv
+
+def legacy_extract_pdf_content(pdf_url: str, extractor: str) -> str:
+    """Original getDocuments.extract_pdf_content: full response body, then a tempfile re-read by the parser"""
+    response = requests.get(pdf_url)
+    response.raise_for_status()
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+        tmp_file.write(response.content)
+        tmp_path = tmp_file.name
+    try:
+        return extract_text(tmp_path, extractor=extractor).strip()
+    finally:
+        os.unlink(tmp_path)
+
+def legacy_cached_text(path: str, extractor: str) -> str:
+    """Original pdfExtract.iter_page_text: the parser is handed the path (PyPDF2 then reads it all into memory)"""
+    if extractor == 'pdfplumber':
+        with pdfplumber.open(path) as pdf:
+            return "".join(page.extract_text() or "" for page in pdf.pages)
+    return "".join(page.extract_text() or "" for page in PyPDF2.PdfReader(path).pages)
+
+def measure(fn, items):
+    """Returns (ms per item, peak KiB over items, outputs); peaks come from a second, traced pass"""
+    start = time.perf_counter()
+    outputs = [fn(item) for item in items]
+    elapsed = time.perf_counter() - start
+    peaks = []
+    for item in items:
+        tracemalloc.start()
+        fn(item)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed / len(items) * 1000, max(peaks) / 1024, outputs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--extractor', default='pypdf2', choices=('pypdf2', 'pdfplumber'))
+    args = parser.parse_args()
+
+    arxiv = FakeArxiv(args.count, pages=args.pages).start()
+    try:
+        urls = [f"{arxiv.url}/pdf/{article_id}" for article_id in arxiv.ids]
+        folder = tempfile.mkdtemp(prefix="bench-pdf-source-")
+        paths = []
+        for article_id in arxiv.ids:
+            path = os.path.join(folder, f"{article_id}.pdf")
+            with open(path, 'wb') as f:
+                f.write(arxiv.pdfs[article_id])
+            paths.append(path)
+        size_kib = sum(len(pdf) for pdf in arxiv.pdfs.values()) / len(arxiv.pdfs) / 1024
+        print(f"{args.count} PDFs, {args.pages} pages, {size_kib:.0f} KiB average, {args.extractor}")
+        print(f"{'case':<44} {'ms/PDF':>8} {'peak KiB':>9}")
+
+        cases = [
+            ("download: body + tempfile (legacy)", urls,
+             lambda url: legacy_extract_pdf_content(url, args.extractor)),
+            ("download: spooled buffer", urls,
+             lambda url: extract_pdf_content(url, extractor=args.extractor)),
+            ("cached file: path opened by parser (legacy)", paths,
+             lambda path: legacy_cached_text(path, args.extractor)),
+            ("cached file: memory-mapped", paths,
+             lambda path: extract_text(path, extractor=args.extractor)),
+        ]
+        results = {}
+        for name, items, fn in cases:
+            ms, peak, outputs = measure(fn, items)
+            results[name] = outputs
+            print(f"{name:<44} {ms:>8.1f} {peak:>9.0f}")
+
+        # Both pairs must extract the same text
+        for legacy, current in ((cases[0][0], cases[1][0]), (cases[2][0], cases[3][0])):
+            assert results[legacy] == results[current], (legacy, current)
+    finally:
+        arxiv.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# samplePdfs.py
+"""Generates small text PDFs for benchmarks without any PDF-writing dependency"""
+import os
+import random
+from typing import List
+
+WORDS = ("model learning neural data training results method network performance task "
+         "approach language agent reasoning benchmark evaluation dataset propose show "
+         "optimization graph attention transformer policy reward inference").split()
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def make_pdf(title: str, pages: int = 10, lines_per_page: int = 50, seed: int = 0,
+             metadata: bool = False) -> bytes:
+    """Builds a PDF with a title line and pages of pseudo-random prose, optionally with an /Info /Title"""
+    rng = random.Random(seed)
+    objects: List[str] = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(pages)), pages),
+    ]
+    font_ref = 3 + 2 * pages
+    for page in range(pages):
+        lines = [title] if page == 0 else []
+        while len(lines) < lines_per_page:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(12)))
+        body = " ".join(f"({_escape(line)}) Tj T*" for line in lines)
+        content = f"BT /F1 9 Tf 40 760 Td 14 TL {body} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * page} 0 R "
+            f"/Resources << /Font << /F1 {font_ref} 0 R >> >> >>")
+        objects.append(f"<< /Length {len(content)} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    if metadata:
+        objects.append(f"<< /Title ({_escape(title)}) /Producer (samplePdfs) >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    info = f" /Info {len(objects)} 0 R" if metadata else ""
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R{info} >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+def write_sample_pdfs(folder: str, count: int, pages: int = 10) -> List[str]:
+    """Writes count sample PDFs into folder and returns their paths"""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"sample-{i:05d}.pdf")
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(make_pdf(f"Sample Paper {i}", pages=pages, seed=i))
+        paths.append(path)
+    return paths
@@ -0,0 +1,364 @@
+# standins.py
+"""Local stand-ins for arXiv (listings, Atom API, PDFs), OpenAI-compatible/Ollama chat endpoints and an SMTP server.
+
+Each server runs on a daemon thread bound to 127.0.0.1 on a free port and
+records when it handled each request, so benchmarks can reconstruct
+per-paper stage timings from the outside.
+"""
+import base64
+import email
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, urlparse
+
+from arxivFixtures import make_papers, render_atom, render_listing
+from samplePdfs import make_pdf
+
+TITLE_RE = re.compile(r'Title: (Sample Paper \d+)')
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, body: bytes, content_type: str = "application/json", status: int = 200,
+                  headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the call (deadline or losing hedge)
+            self.close_connection = True
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+class _Server:
+    handler = _Handler
+
+    def start(self) -> "_Server":
+        server = self
+        handler = type("BoundHandler", (self.handler,), {"server_state": server})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class _ArxivHandler(_Handler):
+    def do_GET(self):
+        state: FakeArxiv = self.server_state
+        if self.path.startswith("/list/"):
+            category = self.path.split("/")[2]
+            if category not in state.listings:
+                self.send_body(b"not found", "text/plain", 404)
+                return
+            state.listing_served = state.listing_served or time.time()
+            state.listing_requests[category] = state.listing_requests.get(category, 0) + 1
+            self.send_body(state.listings[category].encode(), "text/html; charset=utf-8")
+        elif self.path.startswith("/api/query"):
+            state.listing_served = state.listing_served or time.time()
+            state.api_requests += 1
+            self.send_body(state.api_page(parse_qs(urlparse(self.path).query)).encode(),
+                           "application/atom+xml; charset=utf-8")
+        elif self.path.startswith("/pdf/"):
+            # Listing links keep arXiv's "arXiv:" prefix or a version suffix, as arxiv.org accepts both
+            article_id = re.sub(r"v\d+$", "", self.path.rsplit("/", 1)[1].replace("arXiv:", ""))
+            pdf = state.pdfs.get(article_id)
+            if pdf is None:
+                self.send_body(b"not found", "text/plain", 404)
+                return
+            if state.latency:
+                time.sleep(state.latency)
+            self.send_body(pdf, "application/pdf")
+            state.pdf_served[article_id] = time.time()
+            state.pdf_requests[article_id] = state.pdf_requests.get(article_id, 0) + 1
+        else:
+            self.send_body(b"not found", "text/plain", 404)
+
+class FakeArxiv(_Server):
+    """Serves /list/<category>/new pages, the /api/query Atom API and generated PDFs under /pdf/<id>.
+
+    count unique papers are dealt round-robin across categories; the first
+    cross_list fraction of them is cross-listed in every category.
+    """
+
+    handler = _ArxivHandler
+
+    def __init__(self, count: int, pages: int = 8, latency: float = 0.0,
+                 categories: Sequence[str] = ("cs.AI",), cross_list: float = 0.0):
+        self.latency = latency
+        self.papers = make_papers(count, categories, cross_list)
+        self.ids = [paper["id"] for paper in self.papers]
+        self.titles = {paper["id"]: paper["title"] for paper in self.papers}
+        self.pdfs = {article_id: make_pdf(self.titles[article_id], pages=pages, seed=i)
+                     for i, article_id in enumerate(self.ids)}
+        self.listings: Dict[str, str] = {
+            category: render_listing([paper for paper in self.papers if category in paper["categories"]], category)
+            for category in categories
+        }
+        self.listing_served = 0.0
+        self.listing_requests: Dict[str, int] = {}
+        self.api_requests = 0
+        self.pdf_served: Dict[str, float] = {}
+        self.pdf_requests: Dict[str, int] = {}
+
+    def api_page(self, params: Dict[str, List[str]]) -> str:
+        query = params.get("search_query", [""])[0]
+        wanted = set(re.findall(r"cat:([\w.\-]+)", query))
+        matches = [paper for paper in self.papers if wanted & set(paper["categories"])]
+        start = int(params.get("start", ["0"])[0])
+        max_results = int(params.get("max_results", ["10"])[0])
+        return render_atom(matches[start:start + max_results], len(matches), start, query)
+
+class _ChatHandler(_Handler):
+    def do_POST(self):
+        state: FakeLLM = self.server_state
+        raw = self.read_body()
+        received = time.time()
+
+        if self.path.endswith("/files"):
+            self.send_body(json.dumps(state.store_file(self.headers.get("Content-Type", ""), raw)).encode())
+            return
+        if self.path.endswith("/batches"):
+            self.send_body(json.dumps(state.create_batch(json.loads(raw))).encode())
+            return
+
+        body = json.loads(raw)
+        prompt = body["messages"][-1]["content"]
+        match = TITLE_RE.search(prompt)
+        with state.lock:
+            state.requests += 1
+            throttled = state.rng.random() < state.error_rate
+            stalled = state.rng.random() < state.tail_rate
+        if throttled:
+            self.send_body(b'{"error": {"message": "rate limited"}}', status=429,
+                           headers={"Retry-After": str(state.retry_after)})
+            with state.lock:
+                state.throttled += 1
+                if match:
+                    state.calls.setdefault(match.group(1), []).append((received, time.time()))
+            return
+
+        if stalled:
+            time.sleep(state.tail_latency)
+        elif state.latency:
+            time.sleep(max(0.0, state.rng.gauss(state.latency, state.latency * state.jitter)))
+        summary = state.summary_for(prompt)
+        prompt_tokens = len(prompt) // 4
+        if self.path.endswith("/api/chat"):
+            response = {"model": body.get("model", ""), "message": {"role": "assistant", "content": summary},
+                        "done": True, "prompt_eval_count": prompt_tokens, "eval_count": 60}
+        else:
+            response = {
+                "id": "chatcmpl-standin", "object": "chat.completion", "created": int(received),
+                "model": body.get("model", "standin"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": summary}}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 60,
+                          "total_tokens": prompt_tokens + 60}
+            }
+        self.send_body(json.dumps(response).encode())
+        if match:
+            with state.lock:
+                state.calls.setdefault(match.group(1), []).append((received, time.time()))
+
+    def do_GET(self):
+        state: FakeLLM = self.server_state
+        if "/batches/" in self.path:
+            self.send_body(json.dumps(state.poll_batch(self.path.rsplit("/", 1)[1])).encode())
+        elif self.path.endswith("/content"):
+            self.send_body(state.files[self.path.split("/")[-2]], "application/octet-stream")
+        else:
+            self.send_body(b"not found", "text/plain", 404)
+
+class FakeLLM(_Server):
+    """OpenAI-compatible (/v1/chat/completions, files, batches) and Ollama (/api/chat) chat endpoint.
+
+    latency is the mean seconds per completion; error_rate is the fraction of
+    chat requests answered with 429 and a Retry-After header. tail_rate of
+    completions instead take tail_latency seconds, like a stalled local model.
+    """
+
+    handler = _ChatHandler
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, retry_after: float = 1.0,
+                 jitter: float = 0.2, batch_polls: int = 2, seed: int = 0,
+                 tail_rate: float = 0.0, tail_latency: float = 0.0):
+        self.latency = latency
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.jitter = jitter
+        self.batch_polls = batch_polls
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.calls: Dict[str, List[tuple]] = {}
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, dict] = {}
+
+    @staticmethod
+    def summary_for(prompt: str) -> str:
+        match = TITLE_RE.search(prompt)
+        return f"Stand-in summary of {match.group(1) if match else 'a paper'}."
+
+    def store_file(self, content_type: str, raw: bytes) -> dict:
+        message = email.message_from_bytes(f"Content-Type: {content_type}\r\n\r\n".encode() + raw)
+        data = b""
+        for part in message.walk():
+            if part.get_param("name", header="content-disposition") == "file":
+                data = part.get_payload(decode=True)
+        with self.lock:
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = data
+        return {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                "filename": "batch.jsonl", "purpose": "batch", "status": "processed"}
+
+    def create_batch(self, request: dict) -> dict:
+        with self.lock:
+            batch_id = f"batch-{len(self.batches)}"
+            self.batches[batch_id] = {"request": request, "polls": 0}
+        return self._batch_view(batch_id)
+
+    def poll_batch(self, batch_id: str) -> dict:
+        with self.lock:
+            self.batches[batch_id]["polls"] += 1
+        return self._batch_view(batch_id)
+
+    def _batch_view(self, batch_id: str) -> dict:
+        batch = self.batches[batch_id]
+        lines = [json.loads(line) for line in self.files[batch["request"]["input_file_id"]].splitlines() if line]
+        done = batch["polls"] >= self.batch_polls
+        output_file_id = None
+        if done:
+            output_file_id = f"{batch_id}-output"
+            self.files[output_file_id] = "\n".join(json.dumps({
+                "id": f"req-{i}", "custom_id": line["custom_id"], "error": None,
+                "response": {"status_code": 200, "body": {"choices": [{"message": {
+                    "role": "assistant",
+                    "content": self.summary_for(line["body"]["messages"][-1]["content"])}}]}}
+            }) for i, line in enumerate(lines)).encode()
+        return {"id": batch_id, "object": "batch", "endpoint": "/v1/chat/completions",
+                "input_file_id": batch["request"]["input_file_id"], "completion_window": "24h",
+                "status": "completed" if done else "in_progress", "created_at": 0,
+                "output_file_id": output_file_id,
+                "request_counts": {"total": len(lines), "completed": len(lines) if done else 0, "failed": 0}}
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        state: SmtpSink = self.server.state
+        with state.lock:
+            state.connections += 1
+        if state.handshake_latency:
+            # Stands in for the TCP/TLS handshake and login round trips of a remote provider
+            time.sleep(state.handshake_latency)
+        self.reply("220 standin ESMTP")
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.reply("250-standin")
+                self.reply("250-AUTH PLAIN LOGIN")
+                self.reply("250 8BITMIME")
+            elif verb == "AUTH":
+                parts = command.split()
+                if len(parts) == 2 and parts[1].upper() == "LOGIN":
+                    self.reply("334 " + base64.b64encode(b"Username:").decode())
+                    self.rfile.readline()
+                    self.reply("334 " + base64.b64encode(b"Password:").decode())
+                    self.rfile.readline()
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                if state.error_rate and state.rng.random() < state.error_rate:
+                    with state.lock:
+                        state.rejected += 1
+                    self.reply("421 4.7.0 Try again later")
+                    return
+                sender, recipients = command[10:].strip("<> "), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip("<> "))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if data in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                with state.lock:
+                    state.messages.append({"from": sender, "to": recipients, "data": b"".join(lines),
+                                           "received": time.time()})
+                self.reply("250 OK queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class SmtpSink:
+    """Plain SMTP server that accepts any login and keeps every message in memory.
+
+    error_rate of MAIL commands are answered with 421 and the connection is
+    closed, as providers do when throttling.
+    """
+
+    def __init__(self, handshake_latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.lock = threading.Lock()
+        self.messages: List[dict] = []
+        self.handshake_latency = handshake_latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.connections = 0
+        self.rejected = 0
+
+    def start(self) -> "SmtpSink":
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+        self.server.daemon_threads = True
+        self.server.state = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
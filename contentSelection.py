@@ -0,0 +1,107 @@
+# contentSelection.py
+import logging
+import os
+import re
+from typing import List, Tuple
+
+from summaryScheduler import estimate_tokens
+
+CHARS_PER_TOKEN = 4
+
+# Lower value = more useful for a summary; None = never sent to the LLM
+SECTION_PRIORITY = {
+    'abstract': 0,
+    'conclusion': 1,
+    'introduction': 2,
+    'results': 3,
+    'discussion': 3,
+    'limitations': 3,
+    'method': 4,
+    'related work': 5,
+    'front matter': 6,
+    'other': 6,
+    'references': None,
+    'acknowledgments': None,
+    'appendix': None,
+}
+
+SECTION_ALIASES = [
+    ('abstract', r'abstract'),
+    ('introduction', r'introduction'),
+    ('related work', r'related work|background|prior work|preliminaries'),
+    ('method', r'methods?|methodology|approach|proposed method|model'),
+    ('results', r'experiments?|experimental (?:setup|results)|results|evaluation'),
+    ('discussion', r'discussion|analysis'),
+    ('limitations', r'limitations?'),
+    ('conclusion', r'conclusions?(?: and future work)?|concluding remarks|summary and conclusions?|future work'),
+    ('acknowledgments', r'acknowledge?ments?'),
+    ('references', r'references|bibliography'),
+    ('appendix', r'appendix|appendices|supplementary material'),
+]
+
+_ALIASES = '|'.join(f'(?P<s{i}>{pattern})' for i, (_, pattern) in enumerate(SECTION_ALIASES))
+
+# A top-level heading on its own line ("1 Introduction", "IV. RESULTS"), or an inline "Abstract:"/"Abstract—"
+HEADING_RE = re.compile(
+    rf'^[ \t]*(?:(?:\d{{1,2}}|[IVX]{{1,4}})\.?[ \t]+)?(?:{_ALIASES})[ \t]*[.:]?[ \t]*$'
+    r'|^[ \t]*(?P<inline>abstract)[ \t]*[.:—–-]',
+    re.IGNORECASE | re.MULTILINE
+)
+
+def _section_kind(match: re.Match) -> str:
+    if match.group('inline'):
+        return 'abstract'
+    return next(kind for i, (kind, _) in enumerate(SECTION_ALIASES) if match.group(f's{i}'))
+
+def default_input_budget(backend_name: str = "") -> int:
+    """Prompt token budget for a backend: <NAME>_INPUT_TOKENS, then LLM_INPUT_TOKENS"""
+    value = os.getenv(f'{backend_name.upper()}_INPUT_TOKENS') if backend_name else None
+    return int(value or os.getenv('LLM_INPUT_TOKENS', '1000'))
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Splits extracted paper text into (section kind, text) pairs in document order"""
+    sections = []
+    position = 0
+    kind = 'front matter'
+    for match in HEADING_RE.finditer(text):
+        sections.append((kind, text[position:match.start()]))
+        kind = _section_kind(match)
+        position = match.start()
+    sections.append((kind, text[position:]))
+    return [(kind, body) for kind, body in sections if body.strip()]
+
+def select_content(text: str, budget_tokens: int) -> str:
+    """Fills the token budget with the most useful sections, kept in document order.
+
+    Falls back to a plain prefix when no section headings are recognised.
+    """
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    budget_chars = budget_tokens * CHARS_PER_TOKEN
+
+    sections = split_sections(text)
+    if len(sections) <= 1:
+        return text[:budget_chars]
+
+    ranked = sorted(
+        (SECTION_PRIORITY.get(kind, 6), index)
+        for index, (kind, _) in enumerate(sections)
+        if SECTION_PRIORITY.get(kind, 6) is not None
+    )
+    chosen = {}
+    remaining = budget_chars
+    for _, index in ranked:
+        body = sections[index][1].strip()
+        if len(body) <= remaining:
+            chosen[index] = body
+            remaining -= len(body) + 2
+        elif remaining >= 50 * CHARS_PER_TOKEN:
+            chosen[index] = body[:remaining]
+            remaining = 0
+        if remaining <= 0:
+            break
+
+    selected = "\n\n".join(chosen[index] for index in sorted(chosen))
+    logging.debug(f"Selected {', '.join(sections[i][0] for i in sorted(chosen))} "
+                  f"({len(selected)} of {len(text)} chars)")
+    return selected
@@ -1,15 +1,12 @@
 # createEmailSummary.py
 from datetime import datetime
-from typing import List
+from html import escape
+from typing import Iterable, Iterator, List, Optional
 from getDocuments import Article
+from runMetrics import metrics
 
-def create_email_summary(articles: List[Article], pdf_folder: str = None, output_path: str = "finalSummary.html") -> str:
-    """Create formatted HTML summary of articles"""
-    
-    # Set title based on whether we're processing local PDFs or ArXiv papers
-    title = f"Local Papers in {pdf_folder} Summary" if pdf_folder else "ArXiv AI Papers Daily Summary"
-    
-    html_content = f"""
+def _html_header(title: str) -> str:
+    return f"""
     <html>
     <head>
         <style>
@@ -18,39 +15,111 @@ def create_email_summary(articles: List[Article], pdf_folder: str = None, output
             .title {{ color: #2c5282; font-size: 18px; font-weight: bold; }}
             .links {{ margin: 10px 0; }}
             .links a {{ color: #4299e1; text-decoration: none; margin-right: 15px; }}
+            .categories {{ color: #718096; font-size: 13px; }}
+            .authors {{ color: #4a5568; font-size: 14px; margin-top: 4px; }}
+            .skipped li {{ margin: 4px 0; }}
+            .skipped a {{ color: #4299e1; text-decoration: none; }}
+            .duplicate {{ color: #718096; font-size: 13px; font-style: italic; }}
+            .duplicate a {{ color: #4299e1; text-decoration: none; }}
+            .backend {{ color: #a0aec0; font-size: 12px; }}
             .summary {{ line-height: 1.6; }}
         </style>
     </head>
     <body>
-        <h1>{title}</h1>
+        <h1>{escape(title)}</h1>
         <p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M')}</p>
     """
-    
-    for article in articles:
-        # Only show PDF link if it exists
-        pdf_link_html = f'<a href="{article.pdf_link}">PDF</a>' if article.pdf_link else ''
-        # Only show Abstract link if it exists
-        abstract_link_html = f'<a href="{article.abstract_link}">Abstract</a>' if article.abstract_link else ''
-        
-        html_content += f"""
+
+_HTML_FOOTER = """
+    </body>
+    </html>
+    """
+
+def render_article(article: Article) -> str:
+    """Renders one escaped article block"""
+    # Only show PDF link if it exists
+    pdf_link_html = f'<a href="{escape(article.pdf_link)}">PDF</a>' if article.pdf_link else ''
+    # Only show Abstract link if it exists
+    abstract_link_html = f'<a href="{escape(article.abstract_link)}">Abstract</a>' if article.abstract_link else ''
+    # Papers merged from several listings show every category they appeared in
+    categories = article.categories
+    categories_html = f'<span class="categories">{escape(", ".join(categories))}</span>' if categories else ''
+    authors = article.authors
+    authors_html = f'<div class="authors">{escape(", ".join(authors))}</div>' if authors else ''
+    summarized_by = article.summarized_by
+    backend_html = f'<span class="backend">Summarized by {escape(summarized_by)}</span>' if summarized_by else ''
+    duplicate_html = render_duplicate(article.duplicate_of) if article.duplicate_of else ''
+
+    return f"""
         <div class="article">
-            <div class="title">{article.title}</div>
+            <div class="title">{escape(article.title)}</div>
+            {authors_html}
             <div class="links">
                 {pdf_link_html}
                 {abstract_link_html}
+                {categories_html}
+                {backend_html}
             </div>
+            {duplicate_html}
             <div class="summary">
-                <p>{article.summary}</p>
+                <p>{escape(article.summary)}</p>
             </div>
         </div>
         """
-    
-    html_content += """
-    </body>
-    </html>
+
+def render_duplicate(duplicate: dict) -> str:
+    """Note linking a near-duplicate paper to the one whose summary it reuses"""
+    title = escape(duplicate.get("title") or duplicate["article_id"])
+    original = f'<a href="{escape(duplicate["link"])}">{title}</a>' if duplicate.get("link") else title
+    kind = "Revision of an earlier version of" if duplicate.get("earlier_version") else "Near-duplicate of"
+    return (f'<div class="duplicate">{kind} {original} '
+            f'({duplicate["similarity"]:.0%} similar); summary reused</div>')
+
+def render_skipped(article: Article) -> str:
+    """Title-only list entry for a paper the relevance filter did not summarize"""
+    link = article.abstract_link or article.pdf_link
+    title = escape(article.title)
+    return f'\n            <li><a href="{escape(link)}">{title}</a></li>' if link else f"\n            <li>{title}</li>"
+
+def iter_email_html(articles: Iterable[Article], title: str) -> Iterator[str]:
+    """Yields the document in chunks so it can be streamed without building it up front.
+
+    Summarized papers come first; papers skipped by the relevance filter
+    follow as a list of title links.
     """
-    
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(html_content)
-    
-    return html_content
+    yield _html_header(title)
+    skipped = []
+    for article in articles:
+        if article.skipped:
+            skipped.append(article)
+        else:
+            yield render_article(article)
+    if skipped:
+        yield f"""
+        <div class="skipped">
+            <h2>Also new ({len(skipped)} not summarized)</h2>
+            <ul>"""
+        for article in skipped:
+            yield render_skipped(article)
+        yield """
+            </ul>
+        </div>
+        """
+    yield _HTML_FOOTER
+
+def email_title(pdf_folder: Optional[str] = None) -> str:
+    # Set title based on whether we're processing local PDFs or ArXiv papers
+    return f"Local Papers in {pdf_folder} Summary" if pdf_folder else "ArXiv AI Papers Daily Summary"
+
+def create_email_summary(articles: List[Article], pdf_folder: str = None, output_path: str = "finalSummary.html") -> str:
+    """Create formatted HTML summary of articles, streaming it to output_path"""
+    title = email_title(pdf_folder)
+
+    # Each chunk goes straight to the buffered file; the body for emailDelivery is joined once at the end
+    chunks = []
+    with metrics.timed('render'), open(output_path, "w", encoding="utf-8", buffering=1 << 16) as f:
+        for chunk in iter_email_html(articles, title):
+            f.write(chunk)
+            chunks.append(chunk)
+
+    return "".join(chunks)
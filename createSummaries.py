@@ -1,176 +1,129 @@
 import os
 import logging
-from typing import List
-from openai import OpenAI
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from getDocuments import Article
-from dataclasses import dataclass
-import PyPDF2
-import requests
+from pdfCache import pdf_sha256
+from pdfExtract import extract_text, extract_texts, default_max_chars, default_max_pages
+from summaryCache import SummaryCache
+from contentSelection import select_content
+from llmBackends import LLMBackend, create_backend
+from runMetrics import metrics
+from summaryScheduler import SummaryScheduler, estimate_tokens
 
 load_dotenv()
 
-@dataclass
-class Article:
-    title: str
-    pdf_link: str 
-    abstract_link: str
-    article_id: str
-    pdf_content: str
-    summary: str = "" 
-
-def extract_pdf_text(pdf_path: str) -> str:
-    """Extract text content from PDF file"""
+def extract_pdf_text(pdf_path: str, max_chars: Optional[int] = None, max_pages: Optional[int] = None,
+                     extractor: Optional[str] = None) -> str:
+    """Extract text content from PDF file, stopping at the character/page budget"""
+    if max_chars is None:
+        max_chars = default_max_chars()
+    if max_pages is None:
+        max_pages = default_max_pages()
     try:
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            for page in reader.pages:
-                text += page.extract_text() or ""
+        text = extract_text(pdf_path, max_chars=max_chars, max_pages=max_pages, extractor=extractor)
         logging.debug(f"Extracted text from {pdf_path}")
-        return text[:4000]  # Truncate to fit token limits
+        return text
     except Exception as e:
         logging.error(f"Error extracting PDF text: {e}")
         return ""
 
-def create_summaries(articles: List[Article], use_openai: bool = False, llm: str = 'openai') -> List[Article]:
-    """Generate summaries for articles using specified LLM"""
-    
-    # Set default URLs if environment variables are not set
-    fuelix_api_url = os.getenv('FUELIX_API_URL', 'https://proxy.fuelix.com')
-    fuelix_api_key = os.getenv('FUELIX_API_KEY', '')
-    fuelix_model = os.getenv('FUELIX_MODEL', '')
-    ollama_api_url = os.getenv('OLLAMA_API_URL', 'http://localhost:11434/api/chat')
-    ollama_model = os.getenv('OLLAMA_MODEL', 'mistral')
-    lm_studio_api_url = os.getenv('LM_STUDIO_API_URL', 'http://localhost:1234/v1')
-    openai_model = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
-    openai_api_key = os.getenv('OPENAI_API_KEY', '')
-
-
-    system_prompt = """You are a research assistant that provides concise summaries of academic papers.
+SYSTEM_PROMPT = """You are a research assistant that provides concise summaries of academic papers.
     Focus on:
     1. Key findings and contributions
     2. Methodology and approach
     3. Main conclusions and implications
     4. Respond with a basic string, no formatting, titles, heading etc. is required."""
-    
+
+MAX_SUMMARY_TOKENS = 1000
+
+def summary_cache_key(article: Article, backend: LLMBackend) -> str:
+    # The input budget changes which sections reach the model, so it is part of the prompt identity
+    prompt = f"{SYSTEM_PROMPT}\0{backend.input_token_budget}"
+    return SummaryCache.make_key(pdf_sha256(article.pdf_content), backend.name, backend.model, prompt)
+
+def summarize_article(article: Article, pdf_text: str, backend: LLMBackend, scheduler: SummaryScheduler,
+                      cache: Optional[SummaryCache] = None, cache_key: Optional[str] = None) -> Article:
+    """Summarizes already extracted text through the scheduler and stores the result in the cache"""
+    try:
+        if not pdf_text:
+            return article
+        else:
+            logging.debug(f"Extracted text from {article.title}")
+            logging.debug(f"First 100 chars of extracted text: {pdf_text[:100]}")
+
+        pdf_text = select_content(pdf_text, backend.input_token_budget)
+        tokens = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(pdf_text) + MAX_SUMMARY_TOKENS
+        try:
+            article.summary, article.summarized_by = scheduler.run(
+                lambda: backend.summarize_attributed(SYSTEM_PROMPT, article.title, pdf_text, MAX_SUMMARY_TOKENS),
+                tokens)
+            metrics.add('summaries', backend=article.summarized_by)
+        except Exception as e:
+            logging.error(f"Error calling {backend.name} API: {str(e)}")
+            article.summary = ""
+
+        if cache and cache_key and article.summary:
+            cache.put(cache_key, article.article_id, article.summary)
+
+    except Exception as e:
+        logging.error(f"Error processing {article.title}: {str(e)}")
+        article.summary = ""
+    return article
+
+def create_summaries(articles: List[Article], use_openai: bool = False, llm: str = 'openai',
+                     use_cache: bool = True, scheduler: Optional[SummaryScheduler] = None,
+                     backend: Optional[LLMBackend] = None,
+                     texts: Optional[Dict[str, str]] = None) -> List[Article]:
+    """Generate summaries for articles using the given backend (or one built from llm),
+    reusing cached summaries unless use_cache is False. texts maps article ids to
+    already extracted PDF text; otherwise extraction runs on a process pool first."""
+
+    owns_backend = backend is None
+    backend = backend or create_backend(llm)
+    cache = SummaryCache() if use_cache else None
+    scheduler = scheduler or SummaryScheduler()
+
+    cache_keys = {}
+    pending = []
     for article in articles:
         try:
+            if article.skipped:
+                continue
             if not os.path.exists(article.pdf_content):
                 logging.error(f"PDF not found: {article.pdf_content}")
                 continue
-            
-            # Extract PDF text
-            pdf_text = extract_pdf_text(article.pdf_content)
-            if not pdf_text:
-                continue
-            else:
-                logging.debug(f"Extracted text from {article.title}")
-                logging.debug(f"First 100 chars of extracted text: {pdf_text[:100]}")
-            
-            match llm:
-                case 'local':
-                    # Use local LM Studio
-                    headers = {"Content-Type": "application/json"}
-                    payload = {
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": f"""Please summarize this paper:
-                            Title: {article.title}
-                            Content: {pdf_text}"""}
-                        ],
-                        "temperature": 0.3,
-                        "max_tokens": 1000
-                    }
-                    
-                    try:
-                        response = requests.post(
-                            f"{lm_studio_api_url}/chat/completions",
-                            headers=headers,
-                            json=payload
-                        )
-                        response.raise_for_status()
-                        article.summary = response.json()["choices"][0]["message"]["content"]
-                        logging.debug(f"Generated summary using local LLM for: {article.title}")
-                    except requests.exceptions.RequestException as e:
-                        logging.error(f"Error calling local LLM API: {str(e)}")
-                        article.summary = ""
-
-                case 'ollama':
-                    logging.debug(f"Model: {ollama_model}")
-                    # Use Ollama
-                    headers = {"Content-Type": "application/json"}
-                    payload = {
-                        "model": ollama_model,
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": f"""Please summarize this paper:
-                            Title: {article.title}
-                            Content: {pdf_text}"""}
-                        ],
-                        "stream": False
-                    }
-                    
-                    try:
-                        logging.debug(f"Calling Ollama API at {ollama_api_url}")
-                        response = requests.post(
-                            ollama_api_url,
-                            headers=headers,
-                            json=payload
-                        )
-                        response.raise_for_status()
-                        article.summary = response.json()["message"]["content"]
-                        logging.debug(f"Generated summary using Ollama for: {article.title}")
-                    except requests.exceptions.RequestException as e:
-                        logging.error(f"Error calling Ollama API: {str(e)}")
-                        article.summary = ""
-
-                case 'fuelix':
-                    logging.debug(f"Model: {fuelix_model}")
-                    client = OpenAI(api_key=fuelix_api_key,
-                                    base_url="https://proxy.fuelix.ai")
-                    try:
-                        response = client.chat.completions.create(
-                            model=fuelix_model,
-                            messages=[
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": f"""Please summarize this paper:
-                                Title: {article.title}
-                                Content: {pdf_text}"""}
-                            ],
-                            temperature=0.3,
-                            max_tokens=1000
-                        )
-                        article.summary = response.choices[0].message.content
-                        logging.debug(f"Generated summary using FuelIX for: {article.title}")
-                    except Exception as e:
-                        logging.error(f"Error calling FuelIX API: {str(e)}")
-                        article.summary = ""
-
-                case _:  # Default case (openai)
-                    logging.debug(f"Model: {openai_model}")
-                    # Use OpenAI API
-                    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-                    try:
-                        response = client.chat.completions.create(
-                            model=openai_model,
-                            messages=[
-                                {"role": "system", "content": system_prompt},
-                                {"role": "user", "content": f"""Please summarize this paper:
-                                Title: {article.title}
-                                Content: {pdf_text}"""}
-                            ],
-                            temperature=0.3,
-                            max_tokens=1000
-                        )
-                        article.summary = response.choices[0].message.content
-                        logging.debug(f"Generated summary using OpenAI for: {article.title}")
-                    except Exception as e:
-                        logging.error(f"Error calling OpenAI API: {str(e)}")
-                        article.summary = ""
-            
+
+            if cache:
+                cache_key = summary_cache_key(article, backend)
+                cached_summary = cache.get(cache_key)
+                if cached_summary:
+                    article.summary = cached_summary
+                    logging.info(f"Using cached summary for: {article.title}")
+                    continue
+                cache_keys[article.article_id] = cache_key
+            pending.append(article)
         except Exception as e:
             logging.error(f"Error processing {article.title}: {str(e)}")
             article.summary = ""
-            
+
+    # Extract PDF text across CPU cores unless the caller already did
+    if texts is None:
+        texts = extract_texts(
+            [(article.article_id, article.pdf_content) for article in pending],
+            max_chars=default_max_chars(),
+            max_pages=default_max_pages()
+        )
+
+    scheduler.map(
+        lambda article: summarize_article(article, texts.get(article.article_id, ""), backend, scheduler,
+                                          cache, cache_keys.get(article.article_id)),
+        pending
+    )
+
+    if cache:
+        cache.close()
+    if owns_backend:
+        backend.close()
+
     return articles
@@ -0,0 +1,277 @@
+# emailDelivery.py
+import hashlib
+import logging
+import os
+import queue
+import random
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, FrozenSet, Iterator, List, Optional, Sequence
+
+from createEmailSummary import email_title, iter_email_html
+from getDocuments import Article
+from runJournal import RunJournal
+from runMetrics import metrics
+
+@dataclass(frozen=True)
+class Subscriber:
+    address: str
+    categories: FrozenSet[str] = frozenset()  # Empty means every paper
+
+def parse_subscribers(text: str) -> List[Subscriber]:
+    """Parses one "address[: category, category]" entry per line; # starts a comment"""
+    subscribers = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        address, _, categories = line.partition(':')
+        subscribers.append(Subscriber(address.strip(), frozenset(
+            category.strip() for category in categories.split(',') if category.strip())))
+    return subscribers
+
+def load_subscribers(path: Optional[str] = None) -> List[Subscriber]:
+    """RECEIVER_EMAIL (comma-separated, unfiltered) plus the SUBSCRIBERS_PATH file, first entry per address wins"""
+    if path is None:
+        path = os.getenv('SUBSCRIBERS_PATH', '')
+    subscribers = [Subscriber(address.strip())
+                   for address in os.getenv('RECEIVER_EMAIL', '').split(',') if address.strip()]
+    if path:
+        with open(path, encoding="utf-8") as f:
+            subscribers += parse_subscribers(f.read())
+    seen = set()
+    unique = []
+    for subscriber in subscribers:
+        key = subscriber.address.lower()
+        if key not in seen:
+            seen.add(key)
+            unique.append(subscriber)
+    return unique
+
+def articles_for(subscriber: Subscriber, articles: Sequence[Article]) -> List[Article]:
+    """Articles in the subscriber's categories; papers with no categories (local PDFs) always match"""
+    if not subscriber.categories:
+        return list(articles)
+    return [article for article in articles
+            if not article.categories or subscriber.categories & set(article.categories)]
+
+def is_transient(exc: Exception) -> bool:
+    """Dropped connections, timeouts and 4xx replies are worth retrying; 5xx and auth failures are not"""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    return isinstance(exc, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+class SmtpPool:
+    """Logged-in SMTP connections reused across messages, at most max_connections open at once.
+
+    A connection is retired after messages_per_connection sends, since
+    providers cap messages per session, and dropped on any error.
+    """
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None, use_ssl: Optional[bool] = None,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 max_connections: Optional[int] = None, messages_per_connection: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.host = host or os.environ.get('SMTP_HOST', 'smtp.gmail.com')
+        self.port = port or int(os.environ.get('SMTP_PORT', '465'))
+        if use_ssl is None:
+            use_ssl = os.environ.get('SMTP_SSL', 'true').lower() != 'false'
+        if max_connections is None:
+            max_connections = int(os.getenv('SMTP_MAX_CONNECTIONS', '4'))
+        if messages_per_connection is None:
+            messages_per_connection = int(os.getenv('SMTP_MESSAGES_PER_CONNECTION', '100'))
+        if timeout is None:
+            timeout = float(os.getenv('SMTP_TIMEOUT', '30'))
+        self.use_ssl = use_ssl
+        self.username = username if username is not None else os.environ.get('SENDER_EMAIL')
+        self.password = password if password is not None else os.environ.get('SENDER_PASSWORD')
+        self.max_connections = max(1, max_connections)
+        self.messages_per_connection = messages_per_connection
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue()
+        self._slots = threading.Semaphore(self.max_connections)
+        self._sent: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        with metrics.timed('smtp_connect'):
+            server = smtp_class(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.username:
+                    server.login(self.username, self.password)
+            except Exception:
+                self._discard(server)
+                raise
+        metrics.add('smtp_connections')
+        return server
+
+    def _discard(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            self._sent.pop(id(server), None)
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[smtplib.SMTP]:
+        """Lends a logged-in connection; it goes back to the pool only if the block succeeds"""
+        with self._slots:
+            try:
+                server = self._idle.get_nowait()
+            except queue.Empty:
+                server = self._connect()
+            try:
+                yield server
+            except Exception:
+                self._discard(server)
+                raise
+            with self._lock:
+                sent = self._sent[id(server)] = self._sent.get(id(server), 0) + 1
+            if self.messages_per_connection and sent >= self.messages_per_connection:
+                self._discard(server)
+            else:
+                self._idle.put(server)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+def digest_key(articles: Sequence[Article]) -> str:
+    """Short hash of the sorted article ids in a digest, so a changed digest counts as a new message"""
+    ids = "\n".join(sorted(article.article_id for article in articles))
+    return hashlib.sha256(ids.encode("utf-8")).hexdigest()[:16]
+
+class DeliveryError(Exception):
+    pass
+
+def _message(html_part: MIMEText, sender: str, recipient: str, subject: str) -> MIMEMultipart:
+    msg = MIMEMultipart()
+    msg['Subject'] = subject
+    msg['From'] = sender
+    msg['To'] = recipient
+    # The encoded HTML part is shared by every recipient of the same digest
+    msg.attach(html_part)
+    return msg
+
+def deliver(articles: Sequence[Article], subscribers: Optional[Sequence[Subscriber]] = None,
+            journal: Optional[RunJournal] = None, pdf_folder: Optional[str] = None,
+            html_content: Optional[str] = None, pool: Optional[SmtpPool] = None,
+            max_retries: Optional[int] = None, base_delay: float = 1.0, max_delay: float = 30.0) -> int:
+    """Emails each subscriber the digest of their categories, returning how many messages were sent.
+
+    Articles in a digest that any recipient accepted, now or earlier in the
+    run, are flagged delivered.
+
+    Recipients with the same filter share one rendered digest; html_content,
+    if given, is used for unfiltered recipients. Each accepted message is
+    journaled under "mailto:<address>#<digest key>", so a re-run only skips
+    recipients that already got this exact digest; a digest with other
+    papers is still sent. Transient failures are retried with full-jitter
+    backoff; DeliveryError lists the recipients still unsent.
+    """
+    sender = os.environ.get('SENDER_EMAIL')
+    if subscribers is None:
+        subscribers = load_subscribers()
+    if not sender or not os.environ.get('SENDER_PASSWORD') or not subscribers:
+        raise ValueError("Missing required environment variables for email configuration")
+    if max_retries is None:
+        max_retries = int(os.getenv('SMTP_MAX_RETRIES', '3'))
+
+    selections: Dict[FrozenSet[str], List[Article]] = {}
+    keys: Dict[FrozenSet[str], str] = {}
+    for subscriber in subscribers:
+        if subscriber.categories not in selections:
+            selected = articles_for(subscriber, articles)
+            selections[subscriber.categories] = selected
+            keys[subscriber.categories] = digest_key(selected)
+
+    def journal_key(subscriber: Subscriber) -> str:
+        return f"mailto:{subscriber.address}#{keys[subscriber.categories]}"
+
+    def mark_delivered(subscriber: Subscriber) -> None:
+        for article in selections[subscriber.categories]:
+            article.delivered = True
+
+    pending = []
+    for subscriber in subscribers:
+        if journal and journal.get(journal_key(subscriber), 'emailed'):
+            mark_delivered(subscriber)
+        else:
+            pending.append(subscriber)
+    if len(pending) < len(subscribers):
+        logging.info(f"{len(subscribers) - len(pending)} recipients already received this digest today")
+
+    subject = f'AI Papers Daily Summary - {datetime.now().strftime("%Y-%m-%d")}'
+    title = email_title(pdf_folder)
+    parts: Dict[FrozenSet[str], Optional[MIMEText]] = {}
+    for subscriber in pending:
+        if subscriber.categories in parts:
+            continue
+        selected = selections[subscriber.categories]
+        if not any(not article.skipped for article in selected):
+            parts[subscriber.categories] = None
+        elif html_content is not None and not subscriber.categories:
+            parts[subscriber.categories] = MIMEText(html_content, 'html')
+        else:
+            with metrics.timed('render'):
+                parts[subscriber.categories] = MIMEText("".join(iter_email_html(selected, title)), 'html')
+
+    pool = pool or SmtpPool()
+    failures: Dict[str, str] = {}
+
+    def send(subscriber: Subscriber) -> bool:
+        part = parts[subscriber.categories]
+        if part is None:
+            logging.info(f"No new papers in {', '.join(sorted(subscriber.categories))} for {subscriber.address}")
+            return False
+        msg = _message(part, sender, subscriber.address, subject)
+        attempt = 0
+        while True:
+            try:
+                with pool.connection() as server, metrics.timed('smtp_send'):
+                    server.send_message(msg, sender, [subscriber.address])
+                break
+            except Exception as e:
+                if attempt >= max_retries or not is_transient(e):
+                    failures[subscriber.address] = str(e)
+                    logging.error(f"Error sending email to {subscriber.address}: {e}")
+                    return False
+                delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+                attempt += 1
+                metrics.add('smtp_retries')
+                logging.warning(f"Sending to {subscriber.address} failed ({e}); "
+                                f"retry {attempt}/{max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+        if journal:
+            journal.record(journal_key(subscriber), 'emailed')
+        mark_delivered(subscriber)
+        metrics.add('emails_sent')
+        return True
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool.max_connections) as executor:
+            sent = sum(executor.map(send, pending))
+    finally:
+        pool.close()
+
+    logging.info(f"Sent {sent} emails to {len(pending)} pending recipients")
+    if failures:
+        raise DeliveryError(f"{len(failures)} of {len(pending)} recipients not sent: "
+                            + "; ".join(f"{address}: {error}" for address, error in failures.items()))
+    return sent
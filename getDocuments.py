@@ -1,12 +1,20 @@
 import requests
-import pdfplumber
-import tempfile
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from typing import List, Dict, Optional, Sequence, Union
+from dataclasses import dataclass, field
+from pdfCache import PdfCache, verify_pdf_file
+from pdfExtract import extract_text
+from pdfSource import spool_chunks
+from runMetrics import metrics
+import hashlib
+import importlib.util
 import os
-import shutil
 import logging
+import re
+import threading
+import time
 
 @dataclass
 class Article:
@@ -15,147 +23,381 @@ class Article:
     abstract_link: str
     article_id: str
     pdf_content: str  # Keep as pdf_content instead of local_path to match existing class
+    summary: str = ""
+    categories: List[str] = field(default_factory=list)  # Listings the paper appeared in, e.g. cs.AI
+    abstract: str = ""
+    authors: List[str] = field(default_factory=list)
+    published: str = ""  # ISO timestamp of the first version, when the source provides it
+    relevance: Optional[float] = None  # Interest-profile score, set when the relevance filter runs
+    skipped: bool = False  # Filtered out before download; listed by title only
+    duplicate_of: Optional[dict] = None  # Indexed paper whose summary was reused (id, title, link, similarity)
+    summarized_by: str = ""  # Backend that wrote the summary, when it was generated this run or journaled
+    version: str = ""  # e.g. "v2", when the source shows it; part of the PDF cache key
+    replaced: bool = False  # Listed as a replacement, so an unversioned cached PDF may be outdated
+    delivered: bool = False  # In a digest that at least one recipient accepted, this run or earlier today
 
-def extract_pdf_content(pdf_url: str) -> str:
-    """Downloads and extracts text content from PDF"""
+def extract_pdf_content(pdf_url: str, max_chars: Optional[int] = None, max_pages: Optional[int] = None,
+                        extractor: str = 'pdfplumber') -> str:
+    """Downloads and extracts text content from PDF, stopping at the optional character/page budget"""
     try:
-        # Download PDF to temporary file
-        response = requests.get(pdf_url)
-        response.raise_for_status()
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(response.content)
-            tmp_path = tmp_file.name
-            
-        # Extract text from PDF
-        text_content = ""
-        with pdfplumber.open(tmp_path) as pdf:
-            for page in pdf.pages:
-                text_content += page.extract_text() or ""
-                
-        # Cleanup temp file
-        os.unlink(tmp_path)
+        # Stream the PDF into a buffer that only spills to disk past PDF_SPOOL_MAX_MB
+        with requests.get(pdf_url, stream=True) as response:
+            response.raise_for_status()
+            spool, _, _ = spool_chunks(response.iter_content(chunk_size=1 << 16))
+
+        # Extract text straight from the buffer
+        with spool:
+            text_content = extract_text(spool, max_chars=max_chars, max_pages=max_pages, extractor=extractor)
         return text_content.strip()
         
     except Exception as e:
-        print(f"Error extracting PDF content: {e}")
+        logging.error(f"Error extracting PDF content: {e}")
         return ""
 
 def setup_documents_dir(documents_dir: str = "documents") -> str:
-    """Creates/cleans documents directory"""
-    if os.path.exists(documents_dir):
-        shutil.rmtree(documents_dir)
-    os.makedirs(documents_dir)
-    print(f"Created documents dir at: {os.path.abspath(documents_dir)}")
-    print(f"Directory is writable: {os.access(documents_dir, os.W_OK)}")
+    """Creates the documents directory if needed; it doubles as the persistent PDF cache root"""
+    os.makedirs(documents_dir, exist_ok=True)
+    logging.debug(f"Using documents dir at: {os.path.abspath(documents_dir)}")
+    logging.debug(f"Directory is writable: {os.access(documents_dir, os.W_OK)}")
     return documents_dir
 
-def get_new_documents(url: str, documents_dir: str = "documents") -> List[Article]:
-    documents_dir = setup_documents_dir(documents_dir)
-    
+PDF_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/pdf'
+}
+
+class HostThrottle:
+    """Enforces a minimum delay between request starts to the same host"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        if self.delay <= 0:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+def create_session(pool_size: int = 8) -> requests.Session:
+    """Creates a requests session with a keep-alive pool sized for the download workers"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def _listing_parser() -> str:
+    # lxml builds the tree several times faster when it is installed
+    return 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+LISTING_VERSION_RE = re.compile(r'/html/[^/?#]+?(v\d+)/?$')
+
+def parse_listing(html: str, documents_dir: str = "documents") -> List[Article]:
+    """Parses an arXiv listing page into articles whose pdf_content is the target download path.
+
+    Ids come from the abstract link's href, so the "arXiv:" link text can
+    change freely. This is the default source and the fallback for the Atom API.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, _listing_parser())
+    article_elements = soup.find('dl', id='articles')
+
+    if not article_elements:
+        logging.warning("No articles found")
+        return []
+
+    articles = []
+    base_url = os.getenv('ARXIV_BASE_URL', 'https://arxiv.org').rstrip('/')
+
+    # Section headings ("Replacement submissions ...") are tracked in one pass instead of a lookup per entry
+    heading = article_elements.find_previous('h3')
+    section = heading.get_text().lower() if heading else ""
+    terms, sections = [], []
+    for element in article_elements.find_all(['h3', 'dt']):
+        if element.name == 'h3':
+            section = element.get_text().lower()
+        else:
+            terms.append(element)
+            sections.append(section)
+
+    for index, (dt, dd) in enumerate(zip(terms, article_elements.find_all('dd'))):
+        try:
+            link = dt.find('a', {'title': 'Abstract'})
+            href = link.get('href', '')
+            article_id = href.rsplit('/abs/', 1)[1] if '/abs/' in href else link.text.strip().split(':')[-1]
+            # Only the HTML view link carries the version; replacements are flagged by section or marker
+            html_link = dt.find('a', {'title': 'View HTML'})
+            version = LISTING_VERSION_RE.search(html_link.get('href', '')) if html_link else None
+            replaced = '(replaced)' in dt.get_text() or 'replace' in sections[index]
+
+            title = " ".join(dd.find('div', class_='list-title').get_text(" ").split())
+            if title.startswith('Title:'):
+                title = title[len('Title:'):].lstrip()
+            authors = dd.find('div', class_='list-authors')
+            abstract = dd.find('p', class_='mathjax')
+
+            articles.append(Article(
+                title=title,
+                pdf_link=f"{base_url}/pdf/{article_id}",
+                abstract_link=f"{base_url}/abs/{article_id}",
+                article_id=article_id,
+                pdf_content=os.path.join(documents_dir, f"{article_id}.pdf"),
+                abstract=" ".join(abstract.get_text(" ").split()) if abstract else "",
+                authors=[a.get_text(strip=True) for a in authors.find_all('a')] if authors else [],
+                version=version.group(1) if version else "",
+                replaced=replaced
+            ))
+        except Exception as e:
+            logging.error(f"Error parsing listing entry {index}: {str(e)}")
+            continue
+
+    return articles
+
+def download_pdf(session: requests.Session, pdf_link: str, filepath: str,
+                 throttle: Optional[HostThrottle] = None, digest=None) -> str:
+    """Downloads a single PDF to filepath, raising on any failure.
+
+    A hashlib digest, if given, is fed the bytes as they are written so the
+    file does not have to be read back to hash it.
+    """
+    if throttle:
+        throttle.wait(pdf_link)
+
+    logging.info(f"Downloading PDF to: {filepath}")
+
+    received = 0
+    with metrics.timed('pdf_download'), session.get(
+        pdf_link,
+        headers=PDF_HEADERS,
+        stream=True,
+        verify=True,
+        timeout=30
+    ) as pdf_response:
+        # Verify PDF response
+        if pdf_response.status_code != 200:
+            raise Exception(f"PDF download failed with status {pdf_response.status_code}")
+
+        if 'application/pdf' not in pdf_response.headers.get('content-type', ''):
+            raise Exception("Response is not a PDF")
+
+        # Save PDF, checking the size against the advertised length
+        total_size = int(pdf_response.headers.get('content-length', 0))
+        try:
+            with open(filepath, 'wb') as f:
+                for chunk in pdf_response.iter_content(chunk_size=8192):
+                    if chunk:
+                        f.write(chunk)
+                        if digest is not None:
+                            digest.update(chunk)
+                        received += len(chunk)
+        finally:
+            metrics.add('bytes_downloaded', received, kind='pdf')
+
+    verify_pdf_file(filepath, total_size)
+    return filepath
+
+def fetch_document(article: Article, session: requests.Session, throttle: Optional[HostThrottle] = None,
+                   cache: Optional[PdfCache] = None) -> None:
+    """Makes article.pdf_content point at a local copy of its PDF, raising if it cannot be fetched.
+
+    With a cache, hits skip the network and fresh downloads are staged then
+    moved into the store. Entries are keyed by id and version; a replacement
+    whose version is unknown is always re-downloaded over the cached copy.
+    """
+    target = article.pdf_content
+    cache_id = f"{article.article_id}{article.version}"
     try:
-        response = requests.get(url)
+        if cache:
+            cached_path = None if article.replaced and not article.version else cache.get(cache_id)
+            if cached_path:
+                logging.info(f"Using cached PDF for {cache_id}")
+                metrics.add('pdf_cache_hits')
+                article.pdf_content = cached_path
+                return
+            target = cache.staging_path(cache_id)
+
+        digest = hashlib.sha256()
+        download_pdf(session, article.pdf_link, target, throttle, digest)
+        article.pdf_content = cache.put(cache_id, target, digest.hexdigest()) if cache else target
+        logging.info(f"Successfully saved {article.article_id}")
+    except Exception:
+        metrics.add('pdf_download_errors')
+        if os.path.exists(target):
+            os.remove(target)
+        raise
+
+def download_documents(articles: List[Article], session: Optional[requests.Session] = None,
+                       max_workers: Optional[int] = None,
+                       host_delay: Optional[float] = None,
+                       cache: Optional[PdfCache] = None) -> List[Article]:
+    """Downloads article PDFs concurrently, returning the successful ones in listing order"""
+    if max_workers is None:
+        max_workers = int(os.getenv('DOWNLOAD_WORKERS', '8'))
+    if host_delay is None:
+        host_delay = float(os.getenv('DOWNLOAD_HOST_DELAY', '0.2'))
+    max_workers = max(1, max_workers)
+
+    session = session or create_session(max_workers)
+    throttle = HostThrottle(host_delay)
+    failures: Dict[str, str] = {}
+    downloaded = [False] * len(articles)
+
+    def fetch(index: int, article: Article) -> None:
+        try:
+            fetch_document(article, session, throttle, cache)
+            downloaded[index] = True
+        except Exception as e:
+            failures[article.article_id] = str(e)
+            logging.error(f"Error processing article {article.article_id}: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(fetch, range(len(articles)), articles))
+
+    if cache:
+        cache.save()
+
+    if failures:
+        logging.warning(f"{len(failures)} of {len(articles)} PDF downloads failed: "
+                        f"{', '.join(sorted(failures))}")
+
+    return [article for article, ok in zip(articles, downloaded) if ok]
+
+LISTING_CATEGORY_RE = re.compile(r'/list/([^/?#]+)')
+
+def listing_urls(value: Optional[str] = None) -> List[str]:
+    """Listing URLs from a comma-separated ARXIV_URL; bare categories such as cs.LG expand to their /new page"""
+    if value is None:
+        value = os.getenv('ARXIV_URL', 'https://arxiv.org/list/cs.AI/new')
+    base_url = os.getenv('ARXIV_BASE_URL', 'https://arxiv.org').rstrip('/')
+    urls = []
+    for entry in value.split(','):
+        entry = entry.strip()
+        if entry:
+            urls.append(entry if '://' in entry else f"{base_url}/list/{entry}/new")
+    return urls
+
+def listing_category(url: str) -> str:
+    match = LISTING_CATEGORY_RE.search(url)
+    return match.group(1) if match else url
+
+def fetch_listing(url: str, session: requests.Session, documents_dir: str = "documents") -> List[Article]:
+    """Fetches and parses an arXiv listing page, raising on HTTP errors"""
+    with metrics.timed('listing_fetch', source='listing'):
+        response = session.get(url, timeout=30)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        articles = []
-        article_elements = soup.find('dl', id='articles')
-        
-        if not article_elements:
-            logging.warning("No articles found")
-            return []
-            
-        entries = article_elements.find_all(['dt', 'dd'])
-        
-        for i in range(0, len(entries), 2):
-            try:
-                dt = entries[i]
-                dd = entries[i+1]
-                
-                article_id = dt.find('a', {'title': 'Abstract'}).text.strip()
-                abstract_link = f"https://arxiv.org/abs/{article_id}"
-                pdf_link = f"https://arxiv.org/pdf/{article_id}"
-                
-                title = dd.find('div', class_='list-title').text
-                title = title.replace('Title:', '').strip()
-                
-                # Clean article_id by removing "arXiv:" prefix
-                article_id = article_id.replace('arXiv:', '')
-                filename = f"{article_id}.pdf"
-                filepath = os.path.join(documents_dir, filename)
-                
-                # Download PDF with proper headers
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                    'Accept': 'application/pdf'
-                }
-                
-                logging.info(f"Downloading PDF for {article_id}")
-                
-                print(f"Attempting to save PDF to: {filepath}")
-
-                pdf_response = requests.get(
-                    pdf_link, 
-                    headers=headers,
-                    stream=True,
-                    verify=True,
-                    timeout=30
-                )
-                
-                # Verify PDF response
-                if pdf_response.status_code != 200:
-                    logging.error(f"Failed to download PDF: {pdf_response.status_code}")
-                    raise Exception(f"PDF download failed with status {pdf_response.status_code}")
-
-                if 'application/pdf' not in pdf_response.headers.get('content-type', ''):
-                    logging.error("Response is not a PDF")
-                    raise Exception("Response is not a PDF")
-
-                # Save PDF with progress logging
-                with open(filepath, 'wb') as f:
-                    total_size = int(pdf_response.headers.get('content-length', 0))
-                    block_size = 8192
-                    wrote = 0
-                    for chunk in pdf_response.iter_content(chunk_size=block_size):
-                        if chunk:
-                            wrote += len(chunk)
-                            f.write(chunk)
-                    if total_size != 0 and wrote != total_size:
-                        raise Exception("Downloaded file size doesn't match expected size")
-
-                # Verify downloaded file
-                if not os.path.exists(filepath):
-                    raise Exception(f"File not created at {filepath}")
-                if os.path.getsize(filepath) == 0:
-                    os.remove(filepath)
-                    raise Exception("Downloaded file is empty")
-                
-                if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-                    logging.info(f"Successfully saved {filename}")
-                    relative_path = filepath
-                else:
-                    logging.error(f"Failed to save {filename}")
-                    continue
-                
-                article = Article(
-                    title=title,
-                    pdf_link=pdf_link,
-                    abstract_link=abstract_link,
-                    article_id=article_id,
-                    pdf_content=relative_path
-                )
-                
-                articles.append(article)
-                
-            except Exception as e:
-                logging.error(f"Error processing article {article_id if 'article_id' in locals() else 'unknown'}: {str(e)}")
+    metrics.add('bytes_downloaded', len(response.content), kind='listing')
+    with metrics.timed('listing_parse'):
+        articles = parse_listing(response.text, documents_dir)
+    category = listing_category(url)
+    for article in articles:
+        article.categories = [category]
+    return articles
+
+def merge_listings(listings: Sequence[List[Article]]) -> List[Article]:
+    """Merges parsed listings into one article per arXiv id, keeping first-seen order and every source category"""
+    merged: Dict[str, Article] = {}
+    for articles in listings:
+        for article in articles:
+            existing = merged.get(article.article_id)
+            if existing is None:
+                merged[article.article_id] = article
                 continue
-                
-        return articles
-        
+            for category in article.categories:
+                if category not in existing.categories:
+                    existing.categories.append(category)
+    return list(merged.values())
+
+def fetch_listings(urls: Union[str, Sequence[str]], session: requests.Session,
+                   documents_dir: str = "documents") -> List[Article]:
+    """Fetches listing pages concurrently and merges them by arXiv id.
+
+    A listing that fails is logged and left out; an error is raised only if
+    every listing fails.
+    """
+    urls = [urls] if isinstance(urls, str) else list(urls)
+    if not urls:
+        return []
+    listings: List[Optional[List[Article]]] = [None] * len(urls)
+    errors = []
+
+    def fetch(index: int) -> None:
+        try:
+            listings[index] = fetch_listing(urls[index], session, documents_dir)
+        except Exception as e:
+            errors.append(e)
+            logging.error(f"Error fetching listing {urls[index]}: {str(e)}")
+
+    with ThreadPoolExecutor(max_workers=min(len(urls), 8)) as executor:
+        list(executor.map(fetch, range(len(urls))))
+
+    fetched = [articles for articles in listings if articles is not None]
+    if not fetched:
+        raise errors[0]
+    articles = merge_listings(fetched)
+    total = sum(len(listing) for listing in fetched)
+    if len(urls) > 1:
+        logging.info(f"Merged {total} entries from {len(fetched)} listings into {len(articles)} unique papers")
+        metrics.add('listing_duplicates', total - len(articles))
+    return articles
+
+def fetch_articles(urls: Union[str, Sequence[str]], session: requests.Session,
+                   documents_dir: str = "documents") -> List[Article]:
+    """Lists papers for the given listings via ARXIV_SOURCE: the HTML listing pages (default) or the Atom API.
+
+    The listing pages are the day's announcement, replacements included. The
+    API returns the newest submissions up to ARXIV_API_MAX_RESULTS, so it can
+    repeat earlier days' papers unless ARXIV_API_MAX_AGE_DAYS bounds it. The
+    API path falls back to the listing pages if it fails or returns nothing.
+    """
+    urls = [urls] if isinstance(urls, str) else list(urls)
+    if os.getenv('ARXIV_SOURCE', 'listing') == 'api':
+        from arxivApi import fetch_api_articles
+        try:
+            articles = fetch_api_articles(urls, session, documents_dir)
+            if articles:
+                return articles
+            logging.warning("arXiv API returned no papers; falling back to listing pages")
+        except Exception as e:
+            logging.warning(f"arXiv API query failed ({str(e)}); falling back to listing pages")
+    return fetch_listings(urls, session, documents_dir)
+
+def get_new_documents(urls: Union[str, Sequence[str]], documents_dir: str = "documents",
+                      max_workers: Optional[int] = None,
+                      host_delay: Optional[float] = None) -> List[Article]:
+    """Downloads the deduplicated papers from one or more listing pages.
+
+    Papers dropped by the relevance filter are returned too, flagged skipped
+    and not downloaded.
+    """
+    documents_dir = setup_documents_dir(documents_dir)
+
+    try:
+        if max_workers is None:
+            max_workers = int(os.getenv('DOWNLOAD_WORKERS', '8'))
+        session = create_session(max_workers)
+        articles = fetch_articles(urls, session, documents_dir)
+        if not articles:
+            return []
+
+        from relevance import select_relevant
+        selected, skipped = select_relevant(articles)
+        cache = PdfCache(documents_dir)
+        cache.evict()
+        downloaded = download_documents(selected, session, max_workers, host_delay, cache)
+        if not skipped:
+            return downloaded
+        # Skipped papers ride along undownloaded so the email can still list them
+        keep = {id(article) for article in downloaded + skipped}
+        return [article for article in articles if id(article) in keep]
+
     except Exception as e:
         logging.error(f"Error fetching documents: {str(e)}")
         return []
-
-print(f"Documents directory exists: {os.path.exists('documents')}")
-print(f"Current working directory: {os.getcwd()}")
@@ -0,0 +1,311 @@
+# llmBackends.py
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple, Type, TypeVar
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from contentSelection import default_input_budget
+from runMetrics import metrics
+
+R = TypeVar('R')
+
+class DeadlineExceeded(TimeoutError):
+    """A backend call ran past LLM_CALL_DEADLINE; the call is abandoned, not interrupted"""
+
+class LLMBackend:
+    """Chat backend created once per run; subclasses implement _complete for their wire format"""
+
+    name = ""
+
+    def __init__(self, model: str = "", connect_timeout: Optional[float] = None,
+                 read_timeout: Optional[float] = None, pool_size: Optional[int] = None,
+                 input_token_budget: Optional[int] = None, deadline: Optional[float] = None):
+        self.model = model
+        self.input_token_budget = input_token_budget or default_input_budget(self.name)
+        self.connect_timeout = connect_timeout if connect_timeout is not None else float(os.getenv('LLM_CONNECT_TIMEOUT', '10'))
+        self.read_timeout = read_timeout if read_timeout is not None else float(os.getenv('LLM_READ_TIMEOUT', '300'))
+        self.pool_size = pool_size or int(os.getenv('LLM_MAX_IN_FLIGHT', '4'))
+        # Wall-clock limit per call; the read timeout only bounds each socket read
+        self.deadline = deadline if deadline is not None else float(os.getenv('LLM_CALL_DEADLINE', '300'))
+        if self.deadline:
+            # An abandoned call then gives up its connection soon after the deadline
+            self.read_timeout = min(self.read_timeout, self.deadline)
+        self._deadline_pool: Optional[ThreadPoolExecutor] = None
+        self._deadline_lock = threading.Lock()
+
+    @staticmethod
+    def build_messages(system_prompt: str, title: str, text: str) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"""Please summarize this paper:
+            Title: {title}
+            Content: {text}"""}
+        ]
+
+    def summarize(self, system_prompt: str, title: str, text: str, max_tokens: int = 1000) -> str:
+        """Returns the summary text; errors propagate so the scheduler can retry them"""
+        return self.summarize_attributed(system_prompt, title, text, max_tokens)[0]
+
+    def summarize_attributed(self, system_prompt: str, title: str, text: str,
+                             max_tokens: int = 1000) -> Tuple[str, str]:
+        """Returns the summary and the name of the backend that wrote it"""
+        logging.debug(f"Calling {self.name} (model: {self.model or 'default'}) for: {title}")
+        messages = self.build_messages(system_prompt, title, text)
+        with metrics.timed('llm_call', backend=self.name):
+            try:
+                summary = self.within_deadline(lambda: self._complete(messages, max_tokens))
+            except Exception:
+                metrics.add('llm_errors', backend=self.name)
+                raise
+        metrics.add('llm_calls', backend=self.name)
+        logging.debug(f"Generated summary using {self.name} for: {title}")
+        return summary, self.name
+
+    def within_deadline(self, call: Callable[[], R]) -> R:
+        """Runs call on a helper thread and raises DeadlineExceeded if it is still running at the deadline"""
+        if not self.deadline:
+            return call()
+        with self._deadline_lock:
+            if self._deadline_pool is None:
+                # Headroom for abandoned calls that are still waiting on their read timeout
+                self._deadline_pool = ThreadPoolExecutor(max_workers=self.pool_size * 2,
+                                                         thread_name_prefix=f"{self.name}-call")
+        future = self._deadline_pool.submit(call)
+        done, _ = wait([future], timeout=self.deadline)
+        if not done:
+            future.cancel()
+            metrics.add('llm_deadlines_exceeded', backend=self.name)
+            raise DeadlineExceeded(f"{self.name} call exceeded its {self.deadline:g}s deadline")
+        return future.result()
+
+    def _complete(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        raise NotImplementedError
+
+    def record_usage(self, prompt_tokens: Optional[int], completion_tokens: Optional[int]) -> None:
+        """Adds the token counts a response reported; servers that omit usage are skipped"""
+        if prompt_tokens:
+            metrics.add('llm_prompt_tokens', prompt_tokens, backend=self.name)
+        if completion_tokens:
+            metrics.add('llm_completion_tokens', completion_tokens, backend=self.name)
+
+    def close(self) -> None:
+        if self._deadline_pool:
+            self._deadline_pool.shutdown(wait=False)
+
+class HTTPBackend(LLMBackend):
+    """Backend speaking JSON over a keep-alive requests session"""
+
+    def __init__(self, url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def _post(self, payload: dict) -> dict:
+        response = self.session.post(
+            self.url,
+            json=payload,
+            timeout=(self.connect_timeout, self.read_timeout)
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def close(self) -> None:
+        super().close()
+        self.session.close()
+
+class LMStudioBackend(HTTPBackend):
+    name = "local"
+
+    def __init__(self, **kwargs):
+        base_url = os.getenv('LM_STUDIO_API_URL', 'http://localhost:1234/v1')
+        super().__init__(url=f"{base_url}/chat/completions", **kwargs)
+
+    def _complete(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        data = self._post({"messages": messages, "temperature": 0.3, "max_tokens": max_tokens})
+        usage = data.get("usage") or {}
+        self.record_usage(usage.get("prompt_tokens"), usage.get("completion_tokens"))
+        return data["choices"][0]["message"]["content"]
+
+class OllamaBackend(HTTPBackend):
+    name = "ollama"
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('model', os.getenv('OLLAMA_MODEL', 'mistral'))
+        super().__init__(url=os.getenv('OLLAMA_API_URL', 'http://localhost:11434/api/chat'), **kwargs)
+
+    def _complete(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        data = self._post({"model": self.model, "messages": messages, "stream": False})
+        self.record_usage(data.get("prompt_eval_count"), data.get("eval_count"))
+        return data["message"]["content"]
+
+class OpenAIBackend(LLMBackend):
+    """OpenAI SDK client with its own pooled HTTP connections; retries are left to the scheduler"""
+
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, **kwargs):
+        from openai import OpenAI, Timeout
+        kwargs.setdefault('model', os.getenv('OPENAI_MODEL', 'gpt-4o-mini'))
+        super().__init__(**kwargs)
+        self.client = OpenAI(
+            api_key=api_key if api_key is not None else os.getenv('OPENAI_API_KEY'),
+            base_url=base_url,
+            max_retries=0,
+            timeout=Timeout(self.read_timeout, connect=self.connect_timeout)
+        )
+
+    def chat_body(self, messages: List[Dict[str, str]], max_tokens: int) -> dict:
+        """Chat completion parameters, shared by synchronous calls and batch request files"""
+        return {"model": self.model, "messages": messages, "temperature": 0.3, "max_tokens": max_tokens}
+
+    def _complete(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        response = self.client.chat.completions.create(**self.chat_body(messages, max_tokens))
+        if response.usage:
+            self.record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    def close(self) -> None:
+        super().close()
+        self.client.close()
+
+class FuelIXBackend(OpenAIBackend):
+    name = "fuelix"
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('model', os.getenv('FUELIX_MODEL', ''))
+        super().__init__(api_key=os.getenv('FUELIX_API_KEY', ''),
+                         base_url=os.getenv('FUELIX_API_URL', 'https://proxy.fuelix.ai'),
+                         **kwargs)
+
+BACKENDS: Dict[str, Type[LLMBackend]] = {
+    'openai': OpenAIBackend,
+    'fuelix': FuelIXBackend,
+    'local': LMStudioBackend,
+    'ollama': OllamaBackend,
+}
+
+def create_backend(llm: str = 'openai', **kwargs) -> LLMBackend:
+    """Instantiates the backend selected by --llm, falling back to OpenAI like the old default case"""
+    return BACKENDS.get(llm, OpenAIBackend)(**kwargs)
+
+class HedgedBackend(LLMBackend):
+    """Runs a chain of backends, e.g. ollama then openai, to bound tail latency.
+
+    The first backend gets each request. If it has not answered within its
+    hedge delay (LLM_HEDGE_PERCENTILE of its recent successful latencies, or
+    LLM_HEDGE_AFTER seconds until LLM_HEDGE_MIN_SAMPLES are seen), or it
+    fails, a duplicate goes to the next backend in the chain. The first
+    non-empty answer wins and the rest are cancelled or, once running,
+    abandoned. Each member enforces its own call deadline.
+    """
+
+    def __init__(self, backends: Sequence[LLMBackend], hedge_percentile: Optional[float] = None,
+                 hedge_after: Optional[float] = None, min_samples: Optional[int] = None):
+        self.backends = list(backends)
+        self.name = "+".join(backend.name for backend in self.backends)
+        # Every member must accept the same prompt, so the smallest budget applies
+        super().__init__(model="+".join(backend.model or backend.name for backend in self.backends),
+                         input_token_budget=min(backend.input_token_budget for backend in self.backends),
+                         pool_size=max(backend.pool_size for backend in self.backends), deadline=0)
+        if hedge_percentile is None:
+            hedge_percentile = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+        if hedge_after is None:
+            hedge_after = float(os.getenv('LLM_HEDGE_AFTER', '60'))
+        if min_samples is None:
+            min_samples = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+        self.hedge_percentile = hedge_percentile
+        self.hedge_after = hedge_after
+        self.min_samples = min_samples
+        self._latencies: Dict[str, Deque[float]] = {backend.name: deque(maxlen=500) for backend in self.backends}
+        self._latency_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.pool_size * len(self.backends) * 2,
+                                            thread_name_prefix="hedge")
+
+    def hedge_delay(self, backend: LLMBackend) -> float:
+        """Seconds to wait on backend before hedging to the next one"""
+        with self._latency_lock:
+            samples = sorted(self._latencies[backend.name])
+        if len(samples) < self.min_samples:
+            return self.hedge_after
+        return samples[min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))]
+
+    def _call(self, backend: LLMBackend, system_prompt: str, title: str, text: str,
+              max_tokens: int) -> Tuple[str, str]:
+        start = time.perf_counter()
+        result = backend.summarize_attributed(system_prompt, title, text, max_tokens)
+        if result[0]:
+            with self._latency_lock:
+                self._latencies[backend.name].append(time.perf_counter() - start)
+        return result
+
+    def summarize_attributed(self, system_prompt: str, title: str, text: str,
+                             max_tokens: int = 1000) -> Tuple[str, str]:
+        pending: Dict[Future, LLMBackend] = {}
+        errors: List[Exception] = []
+        next_index = 0
+        hedge_at = 0.0
+
+        def launch() -> None:
+            nonlocal next_index, hedge_at
+            backend = self.backends[next_index]
+            next_index += 1
+            pending[self._executor.submit(self._call, backend, system_prompt, title, text, max_tokens)] = backend
+            hedge_at = time.monotonic() + self.hedge_delay(backend)
+
+        launch()
+        while pending:
+            timeout = max(0.0, hedge_at - time.monotonic()) if next_index < len(self.backends) else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                metrics.add('llm_hedges', backend=self.backends[next_index].name)
+                logging.info(f"{pending[next(iter(pending))].name} is slow for {title}; "
+                             f"hedging to {self.backends[next_index].name}")
+                launch()
+                continue
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    summary, source = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    logging.warning(f"{backend.name} failed for {title}: {e}")
+                    continue
+                if summary:
+                    for other in pending:
+                        other.cancel()
+                    if backend is not self.backends[0]:
+                        metrics.add('llm_hedge_wins', backend=source)
+                    return summary, source
+                errors.append(ValueError(f"{backend.name} returned an empty summary"))
+            if not pending and next_index < len(self.backends):
+                metrics.add('llm_fallbacks', backend=self.backends[next_index].name)
+                launch()
+        raise errors[-1]
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for backend in self.backends:
+            backend.close()
+
+def create_backend_chain(llm: str = 'openai', fallbacks: Optional[Sequence[str]] = None, **kwargs) -> LLMBackend:
+    """The --llm backend, hedged with the LLM_FALLBACK backends (comma-separated) when any are configured"""
+    if fallbacks is None:
+        fallbacks = [name.strip() for name in os.getenv('LLM_FALLBACK', '').split(',') if name.strip()]
+    # create_backend maps unknown names to OpenAI, which would turn a typo into a paid fallback
+    unknown = [name for name in fallbacks if name not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown LLM_FALLBACK backend(s) {', '.join(unknown)}, expected one of {tuple(BACKENDS)}")
+    chain = [llm] + [name for name in dict.fromkeys(fallbacks) if name != llm]
+    if len(chain) == 1:
+        return create_backend(llm, **kwargs)
+    return HedgedBackend([create_backend(name, **kwargs) for name in chain])
@@ -1,144 +1,141 @@
 import logging
 import argparse
 import os
+from typing import List, Optional, Sequence, Union
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Parse arguments first to set up logging before any imports
-parser = argparse.ArgumentParser(description='Process ArXiv papers or local PDFs')
-parser.add_argument('--pdfs', type=str, help='Path to folder containing PDF files to process')
-parser.add_argument('--documents', type=str, help='Override default documents directory for downloads', default="documents")
-parser.add_argument('--output', type=str, help='Path for the output HTML summary', default="finalSummary.html")
-parser.add_argument('--llm', choices=['local', "fuelix", 'openai', 'ollama'], default='openai',
-                  help='Choose LLM backend: local (LM Studio), fuelix, openai, or ollama')
-parser.add_argument('--debug', action='store_true', help='Enable debug logging')
-args = parser.parse_args()
-
-# Configure logging before any imports
-logging.basicConfig(
-    level=logging.DEBUG if args.debug else logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
-
-from getDocuments import get_new_documents
-from createSummaries import create_summaries, Article
-from typing import List
-from datetime import datetime
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Process ArXiv papers or local PDFs')
+    parser.add_argument('--pdfs', type=str, help='Path to folder containing PDF files to process')
+    parser.add_argument('--categories', type=str,
+                      help='Comma-separated arXiv categories or listing URLs to merge, e.g. cs.AI,cs.LG (default: ARXIV_URL)')
+    parser.add_argument('--documents', type=str, help='Persistent PDF cache root for downloads', default="documents")
+    parser.add_argument('--output', type=str, help='Path for the output HTML summary', default="finalSummary.html")
+    parser.add_argument('--llm', choices=['local', "fuelix", 'openai', 'ollama'], default='openai',
+                      help='Choose LLM backend: local (LM Studio), fuelix, openai, or ollama')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore cached summaries and call the LLM for every paper')
+    parser.add_argument('--batch', action='store_true',
+                      help='Summarize through the OpenAI Batch API (openai/fuelix only); resumes a pending batch on re-run')
+    parser.add_argument('--no-resume', action='store_true',
+                      help="Ignore today's run journal and process every paper from scratch")
+    parser.add_argument('--rescan', action='store_true',
+                      help='With --pdfs, summarize every PDF again instead of only new or changed ones')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    return parser
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = build_parser()
+    parsed = parser.parse_args(argv)
+    if parsed.batch and parsed.llm not in ('openai', 'fuelix'):
+        parser.error("--batch requires --llm openai or fuelix")
+    return parsed
+
+def configure_logging(debug: bool = False) -> None:
+    """Configures the root logger once; later calls are no-ops"""
+    logging.basicConfig(
+        level=logging.DEBUG if debug else logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+# Cloud Functions import this module under the host's argv, so only the
+# command line below parses sys.argv; imported, it runs with the defaults.
+args = parse_args([])
+
+# Backends, PDF extractors, the listing parser, numpy and the batch client
+# are imported by the code paths that use them, keeping cold starts short.
+from getDocuments import Article, get_new_documents, listing_urls
+from pdfManifest import PdfManifest
+from llmBackends import LLMBackend, create_backend, create_backend_chain
+from pipeline import run_pipeline, summarize_new_documents
+from runJournal import RunJournal
+from runMetrics import metrics
 from createEmailSummary import create_email_summary
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import glob
-
-def process_local_pdfs(pdf_folder: str) -> List[Article]:
-    """Process PDFs from a local folder"""
-    articles = []
-    pdf_files = glob.glob(os.path.join(pdf_folder, "*.pdf"))
-    
-    for pdf_path in pdf_files:
-        try:
-            filename = os.path.basename(pdf_path)
-            article_id = os.path.splitext(filename)[0]
-            
-            # Convert to absolute path for the PDF link
-            abs_path = os.path.abspath(pdf_path)
-            file_url = f"file://{abs_path}"
-            
-            article = Article(
-                title=article_id,  # Using filename as title since we don't have metadata
-                pdf_link=file_url,  # Use file:// URL for local files
-                abstract_link="",  # Empty since it's local
-                article_id=article_id,
-                pdf_content=pdf_path  # Full path to PDF
-            )
-            articles.append(article)
-            logging.info(f"Added local PDF: {pdf_path}")
-            
-        except Exception as e:
-            logging.error(f"Error processing local PDF {pdf_path}: {e}")
-            continue
-            
-    return articles
 
-def process_documents(url: str) -> List[Article]:
-    """Main function to fetch and process documents"""
-    try:
-        documents = get_new_documents(url)
-        logging.info(f"Found {len(documents)} documents")
-        
-        for document in documents:
-            logging.info(f"\nProcessing: {document.title}")
-            print(f"Title: {document.title}")
-            print(f"PDF Link: {document.pdf_link}")
-            print(f"Abstract: {document.abstract_link}")
-            print(f"Content: {document.pdf_content}")
-            print("-" * 80)
-        return documents
-    except Exception as e:
-        logging.error(f"Error processing documents: {e}")
-        raise
+_backend = None
 
-def send_email(html_content: str) -> None:
-    """Send email with the generated report"""
-    # Get email configuration from environment variables
-    sender_email = os.environ.get('SENDER_EMAIL')
-    sender_password = os.environ.get('SENDER_PASSWORD')
-    receiver_email = os.environ.get('RECEIVER_EMAIL')
-    
-    if not all([sender_email, sender_password, receiver_email]):
-        raise ValueError("Missing required environment variables for email configuration")
-    
-    msg = MIMEMultipart()
-    msg['Subject'] = f'AI Papers Daily Summary - {datetime.now().strftime("%Y-%m-%d")}'
-    msg['From'] = sender_email
-    msg['To'] = receiver_email
+def get_backend() -> LLMBackend:
+    """Returns the --llm backend, hedged with any LLM_FALLBACK backends, created once so warm
+    invocations reuse its connection pool. Batch jobs cannot be hedged and use --llm alone."""
+    global _backend
+    if _backend is None:
+        _backend = create_backend(args.llm) if args.batch else create_backend_chain(args.llm)
+    return _backend
 
-    msg.attach(MIMEText(html_content, 'html'))
+def open_journal() -> Optional[RunJournal]:
+    return None if args.no_resume else RunJournal()
 
-    try:
-        with smtplib.SMTP_SSL('smtp.gmail.com', 465) as server:
-            server.login(sender_email, sender_password)
-            server.send_message(msg)
-        logging.info("Email sent successfully")
-    except Exception as e:
-        logging.error(f"Error sending email: {e}")
-        raise
+def summarize_arxiv(urls: Union[str, Sequence[str]], documents_dir: str = "documents",
+                    journal: Optional[RunJournal] = None) -> List[Article]:
+    """Downloads and summarizes the merged listings, streaming papers through the pipeline unless --batch is set"""
+    if args.batch:
+        from batchSummaries import create_batch_summaries
+        articles = get_new_documents(urls, documents_dir)
+        return create_batch_summaries(articles, get_backend(), use_cache=not args.no_cache)
+    # Download, extraction and summarization overlap per paper
+    return summarize_new_documents(urls, get_backend(), documents_dir, use_cache=not args.no_cache,
+                                   journal=journal)
+
+def deliver_summary(articles: List[Article], journal: Optional[RunJournal] = None,
+                    pdf_folder: str = None, output_path: str = "finalSummary.html") -> None:
+    """Renders the summary and emails it to every subscriber that has not received it in this run"""
+    from emailDelivery import deliver
+    html_content = create_email_summary(articles, pdf_folder, output_path)
+    # Recipients are journaled as they are sent, so a retried run skips the ones already reached
+    deliver(articles, journal=journal, pdf_folder=pdf_folder, html_content=html_content)
+    if journal:
+        journal.record_many([article.article_id for article in articles], 'emailed')
 
-def process_and_send_summary(url: str) -> None:
+def process_local_pdfs(pdf_folder: str, manifest: Optional[PdfManifest] = None,
+                       rescan: bool = False) -> List[Article]:
+    """Articles for the new or changed PDFs anywhere under a local folder, titled from their metadata"""
+    manifest = manifest or PdfManifest()
+    articles = manifest.scan(pdf_folder, rescan=rescan)
+    # Hashes and titles are kept even if this run fails before anything is summarized
+    manifest.save()
+    for article in articles:
+        logging.info(f"Added local PDF: {article.pdf_content}")
+    return articles
+
+def process_and_send_summary(urls: Union[str, Sequence[str]]) -> None:
     """Process documents and send email summary"""
+    journal = open_journal()
     try:
-        newArticles = process_documents(url)
-        if not newArticles:
-            logging.warning("No articles found to process")
-            return
-            
-        finalArticles = create_summaries(newArticles, llm=args.llm)
+        finalArticles = summarize_arxiv(urls, journal=journal)
         if not finalArticles:
             logging.warning("No summaries generated")
             return
             
-        html_content = create_email_summary(finalArticles)
-        send_email(html_content)
+        deliver_summary(finalArticles, journal)
         logging.info("Summary processed and email sent successfully")
         
     except Exception as e:
         logging.error(f"Error in process_and_send_summary: {e}")
         raise
+    finally:
+        if journal:
+            journal.close()
 
 def cloud_function(event, context):
     """Cloud Function entry point"""
+    configure_logging(args.debug)
+    # Warm instances reuse the module, so each invocation starts a fresh report
+    metrics.reset()
     try:
-        arxiv_url = os.environ.get('ARXIV_URL', "https://arxiv.org/list/cs.AI/new")
-        process_and_send_summary(arxiv_url)
+        process_and_send_summary(listing_urls(args.categories))
         return 'Success: Email sent'
     except Exception as e:
         error_msg = f"Error in cloud function: {str(e)}"
         logging.error(error_msg)
         raise Exception(error_msg)  # Cloud Functions will mark as failed
+    finally:
+        metrics.export()
 
 if __name__ == "__main__":
+    args = parse_args()
+    configure_logging(args.debug)
 
     # For local testing, set environment variables
     if not os.environ.get('SENDER_EMAIL'):
@@ -152,46 +149,57 @@ if __name__ == "__main__":
             if not os.path.isdir(args.pdfs):
                 raise ValueError(f"The path {args.pdfs} is not a valid directory")
                 
-            articles = process_local_pdfs(args.pdfs)
+            manifest = PdfManifest()
+            articles = process_local_pdfs(args.pdfs, manifest, rescan=args.rescan)
             if not articles:
+                if manifest.entries:
+                    logging.info(f"No new or changed PDFs under {args.pdfs}")
+                    exit(0)
                 logging.warning("No PDFs found to process")
                 exit(1)
                 
-            finalArticles = create_summaries(articles, llm=args.llm)
+            journal = open_journal()
+            if args.batch:
+                from batchSummaries import create_batch_summaries
+                finalArticles = create_batch_summaries(articles, get_backend(), use_cache=not args.no_cache)
+            else:
+                finalArticles = run_pipeline(articles, get_backend(), download=False, use_cache=not args.no_cache,
+                                             journal=journal)
             if not finalArticles:
                 logging.warning("No summaries generated")
                 exit(1)
                 
-            html_content = create_email_summary(finalArticles, args.pdfs, args.output)
-            send_email(html_content)
+            deliver_summary(finalArticles, journal, args.pdfs, args.output)
+            # Papers no recipient received stay unprocessed, so the next scan picks them up again
+            manifest.mark_processed([article for article in finalArticles if article.delivered])
+            manifest.save()
             logging.info("Summary processed and email sent successfully")
             
         else:
             # Update cloud_function to use the papers directory and LLM choice from args
             def cloud_function_with_papers_dir(event, context):
+                journal = open_journal()
                 try:
-                    arxiv_url = os.environ.get('ARXIV_URL', "https://arxiv.org/list/cs.AI/new")
-                    newArticles = get_new_documents(arxiv_url, args.documents)
-                    if not newArticles:
-                        logging.warning("No articles found to process")
-                        return
-                        
-                    finalArticles = create_summaries(newArticles, llm=args.llm)
+                    finalArticles = summarize_arxiv(listing_urls(args.categories), args.documents, journal)
                     if not finalArticles:
                         logging.warning("No summaries generated")
                         return
                         
-                    html_content = create_email_summary(finalArticles, output_path=args.output)
-                    send_email(html_content)
+                    deliver_summary(finalArticles, journal, output_path=args.output)
                     logging.info("Summary processed and email sent successfully")
                     return 'Success: Email sent'
                 except Exception as e:
                     error_msg = f"Error in cloud function: {str(e)}"
                     logging.error(error_msg)
                     raise Exception(error_msg)
+                finally:
+                    if journal:
+                        journal.close()
 
             cloud_function_with_papers_dir(None, None)
             
     except Exception as e:
         logging.error(f"Error in main: {e}")
         raise
+    finally:
+        metrics.export()
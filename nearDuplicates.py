@@ -0,0 +1,224 @@
+# nearDuplicates.py
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Iterable, List, Optional, Tuple
+
+from getDocuments import Article
+from runMetrics import metrics
+
+WORD_RE = re.compile(r"\w+")
+# Largest prime below 2**32: (a * x + b) % PRIME stays inside uint64 for 32-bit shingle hashes
+PRIME = 4294967291
+SEED = 1
+# Shingle hashes are permuted in blocks to bound the (num_perm x block) working array
+BLOCK = 4096
+
+def lsh_params(threshold: float, num_perm: int, false_negative_weight: float = 0.7) -> Tuple[int, int]:
+    """Chooses (bands, rows) minimizing weighted false positive/negative area around the threshold.
+
+    Candidates are verified against the estimated Jaccard afterwards, so
+    missed duplicates are weighted above extra candidates.
+    """
+    steps = 200
+    best, best_cost = (1, num_perm), float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        cost = 0.0
+        for step in range(steps):
+            s = (step + 0.5) / steps
+            p = 1 - (1 - s ** rows) ** bands
+            cost += ((1 - false_negative_weight) * p if s < threshold else false_negative_weight * (1 - p)) / steps
+        if cost < best_cost:
+            best, best_cost = (bands, rows), cost
+    return best
+
+class NearDuplicateIndex:
+    """MinHash signatures with LSH banding over extracted paper text, persisted in SQLite.
+
+    Each summarized paper's signature is split into bands whose hashes are
+    stored in an indexed column, so a lookup is a handful of B-tree probes
+    regardless of index size; candidates are then checked against the
+    Jaccard threshold using their full signatures.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: Optional[float] = None,
+                 num_perm: Optional[int] = None, shingle_size: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        import numpy as np
+
+        self.path = path or os.getenv('NEAR_DUP_INDEX_PATH', 'near_duplicates.sqlite3')
+        if threshold is None:
+            threshold = float(os.getenv('NEAR_DUP_THRESHOLD', '0.8'))
+        if num_perm is None:
+            num_perm = int(os.getenv('NEAR_DUP_NUM_PERM', '128'))
+        if shingle_size is None:
+            shingle_size = int(os.getenv('NEAR_DUP_SHINGLE_WORDS', '5'))
+        if max_entries is None:
+            max_entries = int(os.getenv('NEAR_DUP_MAX_ENTRIES', '100000'))
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        rng = np.random.RandomState(SEED)
+        self._a = rng.randint(1, PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.randint(0, PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS papers (
+                article_id TEXT PRIMARY KEY,
+                title TEXT,
+                link TEXT,
+                summary TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                created REAL NOT NULL,
+                content TEXT
+            );
+            CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER NOT NULL, article_id TEXT NOT NULL);
+            CREATE INDEX IF NOT EXISTS buckets_by_key ON buckets (bucket);
+            CREATE INDEX IF NOT EXISTS buckets_by_article ON buckets (article_id);
+        """)
+        # Indexes written before content hashes were stored lack the column
+        if "content" not in {row[1] for row in self._conn.execute("PRAGMA table_info(papers)")}:
+            self._conn.execute("ALTER TABLE papers ADD COLUMN content TEXT")
+        self._check_params()
+
+    def _check_params(self) -> None:
+        """Signatures are only comparable under the same hashing and banding, so a change resets the index"""
+        params = json.dumps({"num_perm": self.num_perm, "shingle": self.shingle_size, "seed": SEED,
+                             "bands": self.bands, "rows": self.rows})
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'params'").fetchone()
+            if row and row[0] != params:
+                logging.warning("Near-duplicate index parameters changed; rebuilding it")
+                self._conn.execute("DELETE FROM papers")
+                self._conn.execute("DELETE FROM buckets")
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('params', ?)", (params,))
+            self._conn.commit()
+
+    def shingles(self, text: str) -> List[int]:
+        words = WORD_RE.findall(text.lower())
+        size = self.shingle_size
+        if len(words) < size:
+            return [zlib.crc32(" ".join(words).encode())] if words else []
+        return [zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)]
+
+    def signature(self, text: str):
+        """MinHash signature (uint32 array of num_perm values) of the text's word shingles, or None if empty"""
+        import numpy as np
+
+        hashes = np.unique(np.asarray(self.shingles(text), dtype=np.uint64))
+        if not len(hashes):
+            return None
+        signature = np.full(self.num_perm, PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), BLOCK):
+            block = hashes[start:start + BLOCK]
+            np.minimum(signature, ((self._a * block + self._b) % PRIME).min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def _bucket_keys(self, signature) -> List[int]:
+        keys = []
+        for band in range(self.bands):
+            digest = hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(),
+                                     digest_size=8, person=band.to_bytes(4, 'big') + b'lsh').digest()
+            keys.append(int.from_bytes(digest, 'big', signed=True))
+        return keys
+
+    def find(self, signature, article_id: Optional[str] = None, content: Optional[str] = None) -> Optional[dict]:
+        """Returns the most similar indexed paper at or above the threshold, with its summary and similarity.
+
+        article_id and content (the PDF hash) identify the querying paper, so
+        it does not match its own entry from an earlier run. An entry with the
+        same id but other content is an earlier version and is flagged so.
+        """
+        import numpy as np
+
+        keys = self._bucket_keys(signature)
+        with metrics.timed('near_duplicate_lookup'), self._lock:
+            candidates = [row[0] for row in self._conn.execute(
+                f"SELECT DISTINCT article_id FROM buckets WHERE bucket IN ({','.join('?' * len(keys))})", keys)]
+            if not candidates:
+                return None
+            rows = self._conn.execute(
+                f"SELECT article_id, title, link, summary, signature, content FROM papers "
+                f"WHERE article_id IN ({','.join('?' * len(candidates))})", candidates).fetchall()
+        best = None
+        for candidate_id, title, link, summary, blob, candidate_content in rows:
+            same_paper = article_id is not None and candidate_id == article_id
+            # Entries without a content hash cannot be told apart from this very file
+            if same_paper and (candidate_content is None or candidate_content == content):
+                continue
+            similarity = float(np.mean(np.frombuffer(blob, dtype=np.uint32) == signature))
+            if similarity >= self.threshold and (best is None or similarity > best["similarity"]):
+                best = {"article_id": candidate_id, "title": title, "link": link, "summary": summary,
+                        "similarity": similarity, "earlier_version": same_paper}
+        return best
+
+    def add(self, article: Article, signature, content: Optional[str] = None) -> None:
+        self.add_many([(article.article_id, article.title, article.abstract_link or article.pdf_link,
+                        article.summary, signature, content)])
+
+    def add_many(self, entries: Iterable[Tuple[str, str, str, str, object, Optional[str]]]) -> None:
+        """Indexes (article_id, title, link, summary, signature, content hash) tuples in one transaction"""
+        now = time.time()
+        with self._lock:
+            for article_id, title, link, summary, signature, content in entries:
+                self._conn.execute("DELETE FROM buckets WHERE article_id = ?", (article_id,))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO papers (article_id, title, link, summary, signature, created, content) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (article_id, title, link, summary, signature.tobytes(), now, content))
+                self._conn.executemany("INSERT INTO buckets (bucket, article_id) VALUES (?, ?)",
+                                       [(key, article_id) for key in self._bucket_keys(signature)])
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+
+    def evict(self) -> None:
+        """Keeps the max_entries most recently indexed papers"""
+        with self._lock:
+            stale = [row[0] for row in self._conn.execute(
+                "SELECT article_id FROM papers ORDER BY created DESC LIMIT -1 OFFSET ?", (self.max_entries,))]
+            for start in range(0, len(stale), 500):
+                chunk = stale[start:start + 500]
+                marks = ','.join('?' * len(chunk))
+                self._conn.execute(f"DELETE FROM buckets WHERE article_id IN ({marks})", chunk)
+                self._conn.execute(f"DELETE FROM papers WHERE article_id IN ({marks})", chunk)
+            self._conn.commit()
+
+    def close(self) -> None:
+        try:
+            self.evict()
+        except sqlite3.Error as e:
+            logging.warning(f"Near-duplicate index eviction failed: {e}")
+        with self._lock:
+            self._conn.close()
+
+def open_index(enabled: bool = True) -> Optional[NearDuplicateIndex]:
+    """The index when enabled and NEAR_DUP_THRESHOLD > 0, else None"""
+    if not enabled or float(os.getenv('NEAR_DUP_THRESHOLD', '0.8')) <= 0:
+        return None
+    return NearDuplicateIndex()
+
+def reuse_summary(article: Article, match: dict) -> None:
+    """Gives article the matched paper's summary and records what it duplicates"""
+    article.summary = match["summary"]
+    article.duplicate_of = {key: match[key] for key in ("article_id", "title", "link", "similarity",
+                                                        "earlier_version")}
+    metrics.add('near_duplicates')
+    kind = "a revision of an earlier version of" if match["earlier_version"] else "a near-duplicate of"
+    logging.info(f"{article.title} is {kind} {match['title']} "
+                 f"({match['similarity']:.0%} similar); reusing its summary")
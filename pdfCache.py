@@ -0,0 +1,168 @@
+# pdfCache.py
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+INDEX_FILE = "index.json"
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+def verify_pdf_file(filepath: str, expected_size: int = 0) -> int:
+    """Checks a PDF on disk exists, is non-empty and matches the expected size; returns its size"""
+    if not os.path.exists(filepath):
+        raise Exception(f"File not created at {filepath}")
+    size = os.path.getsize(filepath)
+    if size == 0:
+        os.remove(filepath)
+        raise Exception("Downloaded file is empty")
+    if expected_size != 0 and size != expected_size:
+        raise Exception("Downloaded file size doesn't match expected size")
+    return size
+
+def split_version(article_id: str) -> Tuple[str, str]:
+    """Splits '2401.12345v2' into ('2401.12345', 'v2'); unversioned ids get an empty version"""
+    match = re.match(r'^(.*?)(v\d+)?$', article_id)
+    return match.group(1), match.group(2) or ""
+
+def file_sha256(filepath: str) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def pdf_sha256(filepath: str) -> str:
+    """Content hash of a PDF; blobs in the store are named by it, so only files outside it are read"""
+    name, ext = os.path.splitext(os.path.basename(filepath))
+    parent = os.path.dirname(filepath)
+    if (ext == ".pdf" and SHA256_RE.match(name) and os.path.basename(parent) == name[:2]
+            and os.path.basename(os.path.dirname(parent)) == "objects"):
+        return name
+    return file_sha256(filepath)
+
+class PdfCache:
+    """Persistent content-addressed PDF store indexed by arXiv id and version.
+
+    Blobs live under <root>/objects/<sha[:2]>/<sha>.pdf so cross-lists and
+    re-fetches of identical files share storage. index.json maps
+    "<id>@<version>" to the blob hash, size and fetch/access times.
+    """
+
+    def __init__(self, root: str = "documents", max_bytes: Optional[int] = None,
+                 max_age_days: Optional[float] = None):
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv('PDF_CACHE_MAX_MB', '2048')) * 1024 * 1024)
+        if max_age_days is None:
+            max_age_days = float(os.getenv('PDF_CACHE_MAX_AGE_DAYS', '30'))
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.objects_dir = os.path.join(root, "objects")
+        self.staging_dir = os.path.join(root, "staging")
+        self.index_path = os.path.join(root, INDEX_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        self.entries: Dict[str, dict] = self._load_index()
+
+    def _load_index(self) -> Dict[str, dict]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable PDF cache index {self.index_path}: {e}")
+            return {}
+
+    @staticmethod
+    def key(article_id: str) -> str:
+        base, version = split_version(article_id)
+        return f"{base}@{version}"
+
+    def _object_path(self, sha: str) -> str:
+        return os.path.join(self.objects_dir, sha[:2], f"{sha}.pdf")
+
+    def staging_path(self, article_id: str) -> str:
+        return os.path.join(self.staging_dir, f"{article_id.replace('/', '_')}.pdf")
+
+    def get(self, article_id: str) -> Optional[str]:
+        """Returns the cached PDF path for an article, or None if missing, stale or corrupt"""
+        key = self.key(article_id)
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            path = self._object_path(entry["sha256"])
+            try:
+                verify_pdf_file(path, entry["size"])
+            except Exception as e:
+                logging.warning(f"Dropping cached PDF for {article_id}: {e}")
+                del self.entries[key]
+                return None
+            if self.max_age and time.time() - entry["fetched"] > self.max_age:
+                return None
+            entry["accessed"] = time.time()
+            return path
+
+    def put(self, article_id: str, filepath: str, sha: Optional[str] = None) -> str:
+        """Moves a downloaded PDF into the store and returns its cached path.
+
+        sha is the file's SHA-256 when the caller hashed it while writing.
+        """
+        size = verify_pdf_file(filepath)
+        sha = sha or file_sha256(filepath)
+        path = self._object_path(sha)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            os.remove(filepath)
+        else:
+            os.replace(filepath, path)
+        now = time.time()
+        with self._lock:
+            self.entries[self.key(article_id)] = {
+                "sha256": sha, "size": size, "fetched": now, "accessed": now
+            }
+        return path
+
+    def evict(self) -> None:
+        """Drops entries older than max age, then least recently used blobs until under max size"""
+        now = time.time()
+        with self._lock:
+            if self.max_age:
+                for key in [k for k, e in self.entries.items() if now - e["fetched"] > self.max_age]:
+                    del self.entries[key]
+
+            blobs: Dict[str, dict] = {}
+            for entry in self.entries.values():
+                blob = blobs.setdefault(entry["sha256"], {"size": entry["size"], "accessed": 0})
+                blob["accessed"] = max(blob["accessed"], entry["accessed"])
+
+            total = sum(blob["size"] for blob in blobs.values())
+            for sha, blob in sorted(blobs.items(), key=lambda item: item[1]["accessed"]):
+                if total <= self.max_bytes:
+                    break
+                total -= blob["size"]
+                del blobs[sha]
+            self.entries = {k: e for k, e in self.entries.items() if e["sha256"] in blobs}
+
+            # Remove blobs no longer referenced by the index
+            for dirpath, _, filenames in os.walk(self.objects_dir):
+                for filename in filenames:
+                    if os.path.splitext(filename)[0] not in blobs:
+                        os.remove(os.path.join(dirpath, filename))
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            os.makedirs(self.staging_dir, exist_ok=True)
+
+    def save(self) -> None:
+        """Writes the index atomically"""
+        with self._lock:
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.index_path)
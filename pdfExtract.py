@@ -0,0 +1,186 @@
+# pdfExtract.py
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from pdfSource import PdfSource, open_pdf
+from runMetrics import metrics
+
+EXTRACTORS = ('pypdf2', 'pdfplumber')
+
+def default_max_chars() -> Optional[int]:
+    # Generous cap: contentSelection trims to the prompt budget after sections are known
+    value = int(os.getenv('PDF_MAX_CHARS', '100000'))
+    return value if value > 0 else None
+
+def default_max_pages() -> Optional[int]:
+    value = int(os.getenv('PDF_MAX_PAGES', '0'))
+    return value if value > 0 else None
+
+def iter_page_text(source: PdfSource, extractor: str = 'pypdf2') -> Iterator[str]:
+    """Yields the text of each page lazily so callers can stop parsing early"""
+    if extractor not in EXTRACTORS:
+        raise ValueError(f"Unknown PDF extractor '{extractor}', expected one of {EXTRACTORS}")
+    with open_pdf(source) as stream:
+        if extractor == 'pdfplumber':
+            import pdfplumber
+            with pdfplumber.open(stream) as pdf:
+                for page in pdf.pages:
+                    yield page.extract_text() or ""
+                    # pdfplumber caches parsed layout objects per page
+                    page.flush_cache()
+        else:
+            import PyPDF2
+            reader = PyPDF2.PdfReader(stream)
+            for page in reader.pages:
+                yield page.extract_text() or ""
+
+def extract_text(source: PdfSource, max_chars: Optional[int] = None,
+                 max_pages: Optional[int] = None, extractor: Optional[str] = None) -> str:
+    """Extracts text page by page, stopping once max_chars or max_pages is reached"""
+    extractor = extractor or os.getenv('PDF_EXTRACTOR', 'pypdf2')
+    parts = []
+    length = 0
+    # Closing the page iterator releases the mapped file as soon as the budget is met
+    with closing(iter_page_text(source, extractor)) as pages:
+        for page_number, page_text in enumerate(pages, start=1):
+            parts.append(page_text)
+            length += len(page_text)
+            if max_chars is not None and length >= max_chars:
+                break
+            if max_pages is not None and page_number >= max_pages:
+                break
+    text = "".join(parts)
+    if max_chars is not None:
+        text = text[:max_chars]
+    logging.debug(f"Extracted {len(text)} chars from {len(parts)} pages using {extractor}")
+    return text
+
+def available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+class ExtractionTimeout(Exception):
+    pass
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+def extract_task(task: Tuple[str, str, Optional[float], Optional[int], Optional[int], Optional[str]]) -> Tuple[str, str]:
+    """Runs in a pool process; SIGALRM bounds the time spent on one file"""
+    article_id, pdf_path, timeout, max_chars, max_pages, extractor = task
+    # Signal handlers can only be installed from the main thread
+    use_alarm = (bool(timeout) and hasattr(signal, 'setitimer')
+                 and threading.current_thread() is threading.main_thread())
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return article_id, extract_text(pdf_path, max_chars=max_chars, max_pages=max_pages, extractor=extractor)
+    except ExtractionTimeout:
+        logging.error(f"Extraction of {pdf_path} timed out after {timeout}s")
+        return article_id, ""
+    except Exception as e:
+        logging.error(f"Error extracting PDF text from {pdf_path}: {e}")
+        return article_id, ""
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+def timed_extract_task(task: Tuple[str, str, Optional[float], Optional[int], Optional[int], Optional[str]]) -> Tuple[str, str, float]:
+    """extract_task plus the seconds it took in the worker, so the parent can record it without queueing time"""
+    start = time.perf_counter()
+    article_id, text = extract_task(task)
+    return article_id, text, time.perf_counter() - start
+
+def _warm_up() -> None:
+    return None
+
+class ExtractionPool:
+    """Process pool for extract tasks that replaces itself when a worker dies.
+
+    A worker killed mid-file (e.g. out of memory on a huge PDF) breaks every
+    task in flight; those map to an empty string and later tasks run on a
+    fresh pool, so one pathological PDF cannot abort the batch. Workers are
+    never forked from this process: warm Cloud Function instances keep
+    backend threads alive across invocations, and forking with threads
+    running can deadlock the child.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context(method))
+
+    def warm_up(self) -> None:
+        """Starts the worker processes in the background so the first papers do not wait for them"""
+        self._executor.submit(_warm_up)
+
+    def run(self, task: Tuple[str, str, Optional[float], Optional[int], Optional[int], Optional[str]]) -> Tuple[str, str, float]:
+        """timed_extract_task on a pool process, returning empty text if the pool breaks"""
+        with self._lock:
+            executor = self._executor
+        start = time.perf_counter()
+        try:
+            return executor.submit(timed_extract_task, task).result()
+        except BrokenProcessPool as e:
+            logging.error(f"Extraction worker died while {task[1]} was in flight: {e}")
+            metrics.add('extract_worker_crashes')
+            with self._lock:
+                if self._executor is executor:
+                    executor.shutdown(wait=False)
+                    self._executor = self._new_executor()
+            return task[0], "", time.perf_counter() - start
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._executor.shutdown()
+
+def _collect(results: Iterable[Tuple[str, str, float]]) -> Dict[str, str]:
+    texts = {}
+    for article_id, text, seconds in results:
+        metrics.observe('extract', seconds)
+        texts[article_id] = text
+    return texts
+
+def extract_texts(documents: Iterable[Tuple[str, str]], max_workers: Optional[int] = None,
+                  timeout: Optional[float] = None, max_chars: Optional[int] = None,
+                  max_pages: Optional[int] = None, extractor: Optional[str] = None) -> Dict[str, str]:
+    """Extracts (article_id, pdf_path) pairs across a process pool, returning text keyed by article id.
+
+    Files that fail, exceed the per-file timeout or take down their worker
+    process map to an empty string.
+    """
+    if max_workers is None:
+        max_workers = int(os.getenv('EXTRACT_WORKERS', '0')) or available_cores()
+    if timeout is None:
+        timeout = float(os.getenv('EXTRACT_TIMEOUT', '60'))
+    tasks = [(article_id, path, timeout, max_chars, max_pages, extractor) for article_id, path in documents]
+    if not tasks:
+        return {}
+
+    max_workers = max(1, min(max_workers, len(tasks)))
+    if max_workers == 1:
+        return _collect(timed_extract_task(task) for task in tasks)
+
+    # One feeder thread per worker bounds how many files a crashed worker takes down with it
+    pool = ExtractionPool(max_workers)
+    try:
+        pool.warm_up()
+        with ThreadPoolExecutor(max_workers=max_workers) as feeders:
+            return _collect(feeders.map(pool.run, tasks))
+    finally:
+        pool.shutdown()
@@ -0,0 +1,148 @@
+# pdfManifest.py
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from getDocuments import Article
+from pdfExtract import available_cores
+from pdfSource import open_pdf
+
+# Producer-set titles that name the source file rather than the paper
+PLACEHOLDER_TITLE_RE = re.compile(r'^(untitled|microsoft word - .*|.*\.(docx?|tex|dvi|pdf|ps))$', re.IGNORECASE)
+
+def walk_pdfs(folder: str) -> Iterator[os.DirEntry]:
+    """Yields every *.pdf file under folder, skipping hidden directories"""
+    stack = [folder]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.lower().endswith('.pdf') and entry.is_file():
+                        yield entry
+        except OSError as e:
+            logging.warning(f"Skipping unreadable folder: {e}")
+
+def clean_title(title) -> Optional[str]:
+    title = " ".join(str(title or "").split())
+    if not title or PLACEHOLDER_TITLE_RE.match(title):
+        return None
+    return title
+
+def read_pdf(path: str) -> Tuple[str, Optional[str]]:
+    """Hashes the file and reads its /Title from the same memory-mapped view"""
+    digest = hashlib.sha256()
+    title = None
+    with open_pdf(path) as stream:
+        for block in iter(lambda: stream.read(1 << 20), b''):
+            digest.update(block)
+        try:
+            import PyPDF2
+            metadata = PyPDF2.PdfReader(stream).metadata
+            title = clean_title(metadata.title) if metadata else None
+        except Exception as e:
+            logging.debug(f"No PDF metadata for {path}: {e}")
+    return digest.hexdigest(), title
+
+class PdfManifest:
+    """Persistent record of the PDFs seen under --pdfs folders, keyed by absolute path.
+
+    Each entry holds the file's size, mtime, SHA-256, metadata title and when
+    it was last summarized. Files whose size and mtime are unchanged are not
+    read again; files that changed but hash the same, or were moved, count
+    as already processed.
+    """
+
+    def __init__(self, path: Optional[str] = None, workers: Optional[int] = None):
+        self.path = path or os.getenv('PDF_MANIFEST_PATH', 'pdf_manifest.json')
+        self.workers = workers or available_cores()
+        self._lock = threading.Lock()
+        self.entries: Dict[str, dict] = self._load()
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable PDF manifest {self.path}: {e}")
+            return {}
+
+    def scan(self, folder: str, rescan: bool = False) -> List[Article]:
+        """Returns articles for the new, changed or not yet summarized PDFs under folder.
+
+        With rescan every PDF is returned, though unchanged files are still
+        not re-read. Entries for files no longer under folder are dropped.
+        """
+        root = os.path.abspath(folder)
+        seen: Dict[str, os.stat_result] = {}
+        stale: List[str] = []
+        for entry in walk_pdfs(root):
+            stat = entry.stat()
+            path = os.path.abspath(entry.path)
+            seen[path] = stat
+            known = self.entries.get(path)
+            if not known or known["size"] != stat.st_size or known["mtime_ns"] != stat.st_mtime_ns:
+                stale.append(path)
+
+        # Collected before dropping missing files so moved files are still recognized
+        processed = {entry["sha256"] for entry in self.entries.values() if entry.get("processed")}
+        with self._lock:
+            prefix = root + os.sep
+            for path in [path for path in self.entries if path.startswith(prefix) and path not in seen]:
+                del self.entries[path]
+
+        # Hashing and metadata reads are mostly I/O and hashlib, which release the GIL
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+            for path, (sha, title) in zip(stale, executor.map(read_pdf, stale)):
+                stat = seen[path]
+                with self._lock:
+                    self.entries[path] = {
+                        "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha, "title": title,
+                        # A touched or moved file with known content needs no new summary
+                        "processed": time.time() if sha in processed else None,
+                    }
+        logging.info(f"Scanned {len(seen)} PDFs under {folder}: {len(stale)} new or changed")
+
+        articles = []
+        for path in sorted(seen):
+            entry = self.entries[path]
+            if entry["processed"] and not rescan:
+                continue
+            relative = os.path.relpath(path, root)
+            article_id = os.path.splitext(relative)[0].replace(os.sep, '/')
+            articles.append(Article(
+                title=entry["title"] or os.path.splitext(os.path.basename(path))[0],
+                pdf_link=f"file://{path}",  # Use file:// URL for local files
+                abstract_link="",  # Empty since it's local
+                article_id=article_id,
+                pdf_content=path,
+            ))
+        return articles
+
+    def mark_processed(self, articles: Sequence[Article]) -> None:
+        """Records summarized articles so later scans skip them"""
+        now = time.time()
+        with self._lock:
+            for article in articles:
+                entry = self.entries.get(os.path.abspath(article.pdf_content))
+                if entry and article.summary:
+                    entry["processed"] = now
+
+    def save(self) -> None:
+        """Writes the manifest atomically"""
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,62 @@
+# pdfSource.py
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple, Union
+
+# A path on disk, or an open seekable binary buffer such as a spooled download
+PdfSource = Union[str, BinaryIO]
+
+def default_spool_bytes() -> int:
+    return int(float(os.getenv('PDF_SPOOL_MAX_MB', '32')) * 1024 * 1024)
+
+def spool_chunks(chunks: Iterable[bytes], max_memory: Optional[int] = None) -> Tuple[BinaryIO, str, int]:
+    """Copies a stream of chunks into a buffer that stays in memory up to max_memory bytes, then spills to disk.
+
+    Returns the buffer rewound to the start, with the SHA-256 and size of
+    what was written. The caller closes the buffer.
+    """
+    if max_memory is None:
+        max_memory = default_spool_bytes()
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory, suffix='.pdf')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for chunk in chunks:
+            if chunk:
+                spool.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, digest.hexdigest(), size
+
+@contextmanager
+def open_pdf(source: PdfSource) -> Iterator[BinaryIO]:
+    """Yields a seekable binary view of the PDF without copying it.
+
+    Paths are memory-mapped read-only, so parsers read straight from the
+    page cache instead of loading the file into their own buffer. Open
+    buffers are rewound and used as they are.
+    """
+    if not isinstance(source, str):
+        source.seek(0)
+        yield source
+        return
+    with open(source, 'rb') as f:
+        try:
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError) as e:
+            # Empty files and some filesystems cannot be mapped
+            logging.debug(f"Reading {source} without mmap: {e}")
+            yield f
+            return
+        try:
+            yield view
+        finally:
+            view.close()
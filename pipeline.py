@@ -0,0 +1,226 @@
+# pipeline.py
+import logging
+import os
+from concurrent.futures import Executor, FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from contentSelection import select_content
+from createSummaries import summarize_article, summary_cache_key
+from getDocuments import (Article, HostThrottle, create_session, fetch_document, fetch_articles,
+                          setup_documents_dir)
+from llmBackends import LLMBackend
+from nearDuplicates import open_index, reuse_summary
+from pdfCache import PdfCache, pdf_sha256
+from pdfExtract import ExtractionPool, available_cores, default_max_chars, default_max_pages
+from relevance import select_relevant
+from runJournal import RunJournal
+from runMetrics import metrics
+from summaryCache import SummaryCache
+from summaryScheduler import SummaryScheduler
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+def buffered_map(fn: Callable[[T], R], items: Iterable[T], executor: Executor, buffer_size: int) -> Iterator[R]:
+    """Yields fn(item) results in completion order with at most buffer_size calls in flight.
+
+    Items are pulled from the upstream iterator only when a slot is free, so
+    chaining these generators gives stages that overlap with bounded buffers.
+    """
+    iterator = iter(items)
+    in_flight = set()
+    exhausted = False
+    while True:
+        while not exhausted and len(in_flight) < buffer_size:
+            try:
+                item = next(iterator)
+            except StopIteration:
+                exhausted = True
+                break
+            in_flight.add(executor.submit(fn, item))
+        if not in_flight:
+            return
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield future.result()
+
+def run_pipeline(articles: List[Article], backend: LLMBackend, download: bool = True,
+                 session=None, pdf_cache: Optional[PdfCache] = None, use_cache: bool = True,
+                 scheduler: Optional[SummaryScheduler] = None, buffer_size: Optional[int] = None,
+                 download_workers: Optional[int] = None, host_delay: Optional[float] = None,
+                 extract_workers: Optional[int] = None,
+                 journal: Optional[RunJournal] = None) -> List[Article]:
+    """Streams articles through download -> extract -> summarize so the stages overlap.
+
+    Each paper moves on as soon as its previous stage finishes. With a journal,
+    stage completions are recorded and papers resume from their last completed
+    stage. Returns the articles whose PDFs were available, in input order.
+    """
+    if buffer_size is None:
+        buffer_size = int(os.getenv('PIPELINE_BUFFER', '16'))
+    if download_workers is None:
+        download_workers = int(os.getenv('DOWNLOAD_WORKERS', '8'))
+    if host_delay is None:
+        host_delay = float(os.getenv('DOWNLOAD_HOST_DELAY', '0.2'))
+    if extract_workers is None:
+        extract_workers = int(os.getenv('EXTRACT_WORKERS', '0')) or available_cores()
+    extract_timeout = float(os.getenv('EXTRACT_TIMEOUT', '60'))
+    max_chars = default_max_chars()
+    max_pages = default_max_pages()
+
+    scheduler = scheduler or SummaryScheduler()
+    summary_cache = SummaryCache() if use_cache else None
+    near_duplicates = open_index(use_cache)
+    if download and session is None:
+        session = create_session(download_workers)
+    throttle = HostThrottle(host_delay)
+    available = [False] * len(articles)
+    cache_keys: Dict[int, str] = {}
+    # PDF hashes of papers with signatures, telling a paper's own index entry from an earlier version's
+    contents: Dict[int, str] = {}
+
+    # Extraction processes start while the first papers download
+    extract_pool = ExtractionPool(extract_workers)
+    extract_pool.warm_up()
+    download_pool = ThreadPoolExecutor(max_workers=max(1, download_workers))
+    # Threads that hand work to the process pool, or pass through journaled text
+    extract_feeders = ThreadPoolExecutor(max_workers=buffer_size)
+    summary_pool = ThreadPoolExecutor(max_workers=scheduler.max_in_flight)
+
+    def fetch(item: Tuple[int, Article]) -> Optional[Tuple[int, Article]]:
+        index, article = item
+        try:
+            done = journal.get(article.article_id, 'downloaded') if journal else None
+            if done and os.path.exists(done["pdf_path"]):
+                article.pdf_content = done["pdf_path"]
+            elif download:
+                fetch_document(article, session, throttle, pdf_cache)
+            elif not os.path.exists(article.pdf_content):
+                raise Exception(f"PDF not found: {article.pdf_content}")
+            if journal and not done:
+                journal.record(article.article_id, 'downloaded', pdf_path=article.pdf_content)
+            return item
+        except Exception as e:
+            logging.error(f"Error processing article {article.article_id}: {str(e)}")
+            return None
+
+    def uncached(items: Iterable[Optional[Tuple[int, Article]]]) -> Iterator[Tuple[int, Optional[str]]]:
+        for item in items:
+            if item is None:
+                continue
+            index, article = item
+            available[index] = True
+            if journal:
+                done = journal.get(article.article_id, 'summarized')
+                if done:
+                    article.summary = done["summary"]
+                    article.summarized_by = done.get("backend", "")
+                    logging.info(f"Using journaled summary for: {article.title}")
+                    continue
+            if summary_cache:
+                try:
+                    cache_key = summary_cache_key(article, backend)
+                    cached_summary = summary_cache.get(cache_key)
+                    if cached_summary:
+                        article.summary = cached_summary
+                        logging.info(f"Using cached summary for: {article.title}")
+                        continue
+                    cache_keys[index] = cache_key
+                except Exception as e:
+                    logging.error(f"Error reading summary cache for {article.title}: {str(e)}")
+            yield index
+
+    def extract(index: int) -> Tuple[int, str, object]:
+        article = articles[index]
+        done = journal.get(article.article_id, 'extracted') if journal else None
+        if done:
+            # Journaled text is already trimmed, so it is not comparable with indexed signatures
+            return index, done["text"], None
+        task = (article.article_id, article.pdf_content, extract_timeout, max_chars, max_pages, None)
+        _, pdf_text, seconds = extract_pool.run(task)
+        metrics.observe('extract', seconds)
+        # Signatures cover the full extracted text, before it is trimmed to the prompt budget
+        signature = near_duplicates.signature(pdf_text) if near_duplicates and pdf_text else None
+        if signature is not None:
+            contents[index] = pdf_sha256(article.pdf_content)
+        # Keep only what can reach the model so journaled text stays small
+        pdf_text = select_content(pdf_text, backend.input_token_budget)
+        if journal and pdf_text:
+            journal.record(article.article_id, 'extracted', text=pdf_text)
+        return index, pdf_text, signature
+
+    def unique(results: Iterable[Tuple[int, str, object]]) -> Iterator[Tuple[int, str, object]]:
+        for index, pdf_text, signature in results:
+            article = articles[index]
+            match = (near_duplicates.find(signature, article.article_id, contents.get(index))
+                     if signature is not None else None)
+            if match:
+                reuse_summary(article, match)
+                if journal:
+                    journal.record(article.article_id, 'summarized', summary=article.summary)
+                continue
+            yield index, pdf_text, signature
+
+    def summarize(result: Tuple[int, str, object]) -> Article:
+        index, pdf_text, signature = result
+        article = summarize_article(articles[index], pdf_text, backend, scheduler,
+                                    summary_cache, cache_keys.get(index))
+        if journal and article.summary:
+            journal.record(article.article_id, 'summarized', summary=article.summary, backend=article.summarized_by)
+        if near_duplicates and signature is not None and article.summary:
+            near_duplicates.add(article, signature, contents.get(index))
+        return article
+
+    try:
+        downloaded = buffered_map(fetch, enumerate(articles), download_pool, buffer_size)
+        extracted = buffered_map(extract, uncached(downloaded), extract_feeders, buffer_size)
+        for article in buffered_map(summarize, unique(extracted), summary_pool, buffer_size):
+            source = f" ({article.summarized_by})" if article.summarized_by else ""
+            logging.info(f"Finished: {article.title}{source}")
+    finally:
+        download_pool.shutdown()
+        extract_feeders.shutdown()
+        extract_pool.shutdown()
+        summary_pool.shutdown()
+        if pdf_cache:
+            pdf_cache.save()
+        if summary_cache:
+            summary_cache.close()
+        if near_duplicates:
+            near_duplicates.close()
+
+    failed = len(articles) - sum(available)
+    if failed:
+        logging.warning(f"{failed} of {len(articles)} PDFs could not be fetched")
+
+    return [article for article, ok in zip(articles, available) if ok]
+
+def summarize_new_documents(urls: Union[str, Sequence[str]], backend: LLMBackend, documents_dir: str = "documents",
+                            use_cache: bool = True, journal: Optional[RunJournal] = None) -> List[Article]:
+    """Fetches one or more arXiv listings and streams their deduplicated papers through the pipeline.
+
+    Papers the relevance filter skips come back flagged, in listing order,
+    without a summary.
+    """
+    documents_dir = setup_documents_dir(documents_dir)
+    download_workers = int(os.getenv('DOWNLOAD_WORKERS', '8'))
+    session = create_session(download_workers)
+    try:
+        articles = fetch_articles(urls, session, documents_dir)
+    except Exception as e:
+        logging.error(f"Error fetching documents: {str(e)}")
+        return []
+    logging.info(f"Found {len(articles)} documents")
+    if not articles:
+        return []
+
+    # Only papers that pass the interest profile are downloaded and summarized
+    selected, skipped = select_relevant(articles)
+    pdf_cache = PdfCache(documents_dir)
+    pdf_cache.evict()
+    summarized = run_pipeline(selected, backend, session=session, pdf_cache=pdf_cache,
+                              use_cache=use_cache, download_workers=download_workers, journal=journal)
+    if not skipped:
+        return summarized
+    keep = {id(article) for article in summarized + skipped}
+    return [article for article in articles if id(article) in keep]
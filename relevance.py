@@ -0,0 +1,140 @@
+# relevance.py
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from getDocuments import Article
+from runMetrics import metrics
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9\-]*[a-z0-9]|[a-z0-9]")
+# Title terms count this many times over abstract terms
+TITLE_WEIGHT = 2
+
+STOPWORDS = frozenset("""a an and are as at be by for from has have in into is it its of on or our
+that the their this to we with which via using based towards toward new""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words plus adjacent-word bigrams, so profile phrases like "reinforcement learning" match"""
+    words = [word for word in TOKEN_RE.findall(text.lower()) if word not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def parse_profile(text: str) -> Dict[str, float]:
+    """Parses "term[:weight]" entries separated by commas or newlines; negative weights push papers down"""
+    profile: Dict[str, float] = {}
+    for entry in re.split(r"[,\n]", text):
+        entry = entry.strip()
+        if not entry or entry.startswith('#'):
+            continue
+        term, weight = entry, 1.0
+        if ':' in entry:
+            head, _, tail = entry.rpartition(':')
+            try:
+                term, weight = head, float(tail)
+            except ValueError:
+                pass
+        words = [word for word in TOKEN_RE.findall(term.lower()) if word not in STOPWORDS]
+        if not words:
+            continue
+        # Profile phrases longer than two words are matched through their bigrams
+        keys = [" ".join(words)] if len(words) <= 2 else [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for key in keys:
+            profile[key] = profile.get(key, 0.0) + weight
+    return profile
+
+def load_profile(text: Optional[str] = None, path: Optional[str] = None) -> Dict[str, float]:
+    """Profile from INTEREST_PROFILE, or the file at INTEREST_PROFILE_PATH; empty means no filtering"""
+    if text is None:
+        text = os.getenv('INTEREST_PROFILE', '')
+    if path is None:
+        path = os.getenv('INTEREST_PROFILE_PATH', '')
+    if path:
+        with open(path, encoding="utf-8") as f:
+            text = f"{text}\n{f.read()}"
+    return parse_profile(text)
+
+def score_articles(articles: Sequence[Article], profile: Dict[str, float]):
+    """Cosine similarity between each paper's TF-IDF vector (title and abstract) and the profile.
+
+    The term matrix is kept as (row, column, value) arrays and reduced with
+    np.bincount, so memory grows with the number of distinct terms per paper
+    rather than papers x vocabulary.
+    """
+    import numpy as np
+
+    vocabulary: Dict[str, int] = {term: index for index, term in enumerate(profile)}
+    rows: List[int] = []
+    cols: List[int] = []
+    counts: List[float] = []
+    for row, article in enumerate(articles):
+        terms = Counter(tokenize(article.title))
+        for term in terms:
+            terms[term] *= TITLE_WEIGHT
+        terms.update(tokenize(article.abstract))
+        for term, count in terms.items():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+            counts.append(count)
+    if not rows:
+        return np.zeros(len(articles))
+
+    rows_a = np.asarray(rows)
+    cols_a = np.asarray(cols)
+    size = len(articles)
+    document_frequency = np.bincount(cols_a, minlength=len(vocabulary))
+    idf = np.log((1 + size) / (1 + document_frequency)) + 1
+    # Sublinear term frequency keeps one repeated word from dominating an abstract
+    values = (1 + np.log(np.asarray(counts, dtype=float))) * idf[cols_a]
+    norms = np.sqrt(np.bincount(rows_a, weights=values ** 2, minlength=size))
+
+    query = np.zeros(len(vocabulary))
+    query[:len(profile)] = np.fromiter(profile.values(), dtype=float, count=len(profile))
+    query *= idf
+    query_norm = np.linalg.norm(query) or 1.0
+    dots = np.bincount(rows_a, weights=values * query[cols_a], minlength=size)
+    return dots / (np.where(norms > 0, norms, 1.0) * query_norm)
+
+def select_relevant(articles: List[Article], profile: Optional[Dict[str, float]] = None,
+                    top_k: Optional[int] = None,
+                    min_score: Optional[float] = None) -> Tuple[List[Article], List[Article]]:
+    """Splits articles into (selected, skipped), each in listing order.
+
+    Papers scoring at least RELEVANCE_MIN_SCORE are kept, capped at the
+    RELEVANCE_TOP_K best. Without a profile or any limit every paper is
+    selected. Skipped papers are flagged so the email lists them by title.
+    """
+    if top_k is None:
+        top_k = int(os.getenv('RELEVANCE_TOP_K', '0'))
+    if min_score is None:
+        min_score = float(os.getenv('RELEVANCE_MIN_SCORE', '0'))
+    if not articles or (top_k <= 0 and min_score <= 0):
+        return articles, []
+    if profile is None:
+        profile = load_profile()
+    if not profile:
+        return articles, []
+
+    with metrics.timed('relevance_rank'):
+        scores = score_articles(articles, profile)
+        ranked = scores.argsort(kind='stable')[::-1]
+        keep = ranked[scores[ranked] >= min_score]
+        if top_k > 0:
+            keep = keep[:top_k]
+        keep_set = set(keep.tolist())
+
+    selected, skipped = [], []
+    for index, article in enumerate(articles):
+        article.relevance = float(scores[index])
+        if index in keep_set:
+            selected.append(article)
+        else:
+            article.skipped = True
+            skipped.append(article)
+    metrics.add('relevance_skipped', len(skipped))
+    if skipped:
+        lowest = scores[keep].min() if len(keep) else math.nan
+        logging.info(f"Relevance filter kept {len(selected)} of {len(articles)} papers "
+                     f"(lowest kept score {lowest:.3f})")
+    return selected, skipped
@@ -0,0 +1,76 @@
+# runJournal.py
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+STAGES = ('downloaded', 'extracted', 'summarized', 'emailed')
+
+class RunJournal:
+    """Append-only JSONL record of per-article stage completion for one run.
+
+    Each line is {"run", "article_id", "stage", "ts", ...stage data}. Opening the
+    journal replays the lines for the current run and drops older runs, so a
+    re-run after a crash picks up each article at its last completed stage.
+    Email recipients are journaled the same way, under "mailto:<address>#<digest key>".
+    """
+
+    def __init__(self, path: Optional[str] = None, run_id: Optional[str] = None):
+        self.path = path or os.getenv('RUN_JOURNAL_PATH', 'run_journal.jsonl')
+        self.run_id = run_id or datetime.now().strftime('%Y-%m-%d')
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, dict]] = {}
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        kept = []
+        dropped = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write
+                    dropped += 1
+                    continue
+                if record.get("run") != self.run_id:
+                    dropped += 1
+                    continue
+                kept.append(line if line.endswith("\n") else line + "\n")
+                self.entries.setdefault(record["article_id"], {})[record["stage"]] = record
+        if dropped:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.writelines(kept)
+            os.replace(tmp_path, self.path)
+        if self.entries:
+            logging.info(f"Resuming run {self.run_id}: {len(self.entries)} articles in journal")
+
+    def record(self, article_id: str, stage: str, **data) -> None:
+        record = {"run": self.run_id, "article_id": article_id, "stage": stage, "ts": time.time(), **data}
+        with self._lock:
+            self.entries.setdefault(article_id, {})[stage] = record
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def record_many(self, article_ids: Iterable[str], stage: str) -> None:
+        for article_id in article_ids:
+            self.record(article_id, stage)
+
+    def get(self, article_id: str, stage: str) -> Optional[dict]:
+        with self._lock:
+            return self.entries.get(article_id, {}).get(stage)
+
+    def all_done(self, article_ids: Iterable[str], stage: str) -> bool:
+        article_ids = list(article_ids)
+        return bool(article_ids) and all(self.get(article_id, stage) for article_id in article_ids)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
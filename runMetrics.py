@@ -0,0 +1,134 @@
+# runMetrics.py
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _quantile(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def _prom_labels(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + sorted(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+class RunMetrics:
+    """Thread-safe stage timings and counters for one run.
+
+    Stages are timed with `timed()` or `observe()`; counters (bytes, tokens,
+    errors) go through `add()`. Both accept string labels such as backend.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self._start_clock = time.perf_counter()
+            self.timings: Dict[Tuple[str, Labels], List[float]] = {}
+            self.counters: Dict[Tuple[str, Labels], float] = {}
+
+    def observe(self, stage: str, seconds: float, **labels: str) -> None:
+        with self._lock:
+            self.timings.setdefault((stage, _labels(labels)), []).append(seconds)
+
+    @contextmanager
+    def timed(self, stage: str, **labels: str) -> Iterator[None]:
+        """Records the duration of the block, including when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, **labels)
+
+    def add(self, name: str, value: float = 1, **labels: str) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def report(self) -> dict:
+        with self._lock:
+            timings = {key: sorted(values) for key, values in self.timings.items()}
+            counters = dict(self.counters)
+            wall_seconds = time.perf_counter() - self._start_clock
+        stages = []
+        for (stage, labels), values in sorted(timings.items()):
+            entry = {"stage": stage, **dict(labels), "count": len(values), "total_seconds": sum(values),
+                     "max_seconds": values[-1]}
+            for q in QUANTILES:
+                entry[f"p{int(q * 100)}_seconds"] = _quantile(values, q)
+            stages.append(entry)
+        return {
+            "started": self.started,
+            "wall_seconds": wall_seconds,
+            "stages": stages,
+            "counters": [{"name": name, **dict(labels), "value": value}
+                         for (name, labels), value in sorted(counters.items())],
+        }
+
+    def prometheus_text(self, prefix: str = "newsletter") -> str:
+        """Renders the run in the Prometheus text exposition format (node_exporter textfile collector)"""
+        with self._lock:
+            timings = {key: sorted(values) for key, values in self.timings.items()}
+            counters = dict(self.counters)
+            wall_seconds = time.perf_counter() - self._start_clock
+        lines = [f"# TYPE {prefix}_run_seconds gauge", f"{prefix}_run_seconds {wall_seconds:.6f}",
+                 f"# TYPE {prefix}_run_started_timestamp_seconds gauge",
+                 f"{prefix}_run_started_timestamp_seconds {self.started:.3f}"]
+        if timings:
+            lines.append(f"# TYPE {prefix}_stage_seconds summary")
+        for (stage, labels), values in sorted(timings.items()):
+            for q in QUANTILES:
+                lines.append(f"{prefix}_stage_seconds{_prom_labels(labels, stage=stage, quantile=str(q))} "
+                             f"{_quantile(values, q):.6f}")
+            lines.append(f"{prefix}_stage_seconds_sum{_prom_labels(labels, stage=stage)} {sum(values):.6f}")
+            lines.append(f"{prefix}_stage_seconds_count{_prom_labels(labels, stage=stage)} {len(values)}")
+        declared = set()
+        for (name, labels), value in sorted(counters.items()):
+            metric = f"{prefix}_{name}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_prom_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, report_path: Optional[str] = None, prometheus_path: Optional[str] = None) -> dict:
+        """Writes the JSON report (METRICS_REPORT_PATH) and, if configured, the Prometheus file (METRICS_PROM_PATH)"""
+        report = self.report()
+        report_path = report_path if report_path is not None else os.getenv('METRICS_REPORT_PATH', 'metrics_report.json')
+        prometheus_path = prometheus_path if prometheus_path is not None else os.getenv('METRICS_PROM_PATH', '')
+        for path, content in ((report_path, lambda: json.dumps(report, indent=2)),
+                              (prometheus_path, self.prometheus_text)):
+            if not path:
+                continue
+            try:
+                # Written atomically so a textfile collector never scrapes a partial file
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(content())
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logging.error(f"Could not write metrics to {path}: {e}")
+
+        totals: Dict[str, float] = {}
+        for entry in report["stages"]:
+            totals[entry["stage"]] = totals.get(entry["stage"], 0) + entry["total_seconds"]
+        logging.info(f"Run took {report['wall_seconds']:.1f}s; stage seconds: "
+                     + ", ".join(f"{stage}={seconds:.1f}" for stage, seconds in sorted(totals.items())))
+        return report
+
+# One registry per process; main resets it at the start of each run
+metrics = RunMetrics()
@@ -0,0 +1,88 @@
+# summaryCache.py
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+class SummaryCache:
+    """SQLite store of generated summaries keyed by paper content, backend, model and prompt"""
+
+    def __init__(self, path: Optional[str] = None, ttl_days: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        self.path = path or os.getenv('SUMMARY_CACHE_PATH', 'summary_cache.sqlite3')
+        if ttl_days is None:
+            ttl_days = float(os.getenv('SUMMARY_CACHE_TTL_DAYS', '30'))
+        if max_entries is None:
+            max_entries = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '10000'))
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                article_id TEXT,
+                summary TEXT NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )""")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(content_hash: str, backend: str, model: str, prompt: str) -> str:
+        """Builds a cache key from the paper content hash and everything that shapes the summary"""
+        digest = hashlib.sha256()
+        for part in (content_hash, backend, model, prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            summary, created = row
+            now = time.time()
+            if self.ttl and now - created > self.ttl:
+                self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE summaries SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return summary
+
+    def put(self, key: str, article_id: str, summary: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, article_id, summary, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, article_id, summary, now, now)
+            )
+            self._conn.commit()
+
+    def evict(self) -> None:
+        """Drops expired entries, then the least recently used beyond max_entries"""
+        with self._lock:
+            if self.ttl:
+                self._conn.execute("DELETE FROM summaries WHERE created < ?", (time.time() - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM summaries WHERE key IN ("
+                "SELECT key FROM summaries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        try:
+            self.evict()
+        except sqlite3.Error as e:
+            logging.warning(f"Summary cache eviction failed: {e}")
+        with self._lock:
+            self._conn.close()
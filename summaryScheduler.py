@@ -0,0 +1,153 @@
+# summaryScheduler.py
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Iterable, List, Optional, TypeVar
+
+import requests
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """Blocking token bucket refilled continuously at rate_per_minute; a rate of 0 disables it"""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self.refill_rate = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1) -> None:
+        if self.capacity <= 0:
+            return
+        # A single request larger than the bucket would otherwise wait forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.refill_rate
+            time.sleep(wait)
+
+def error_status(exc: Exception) -> Optional[int]:
+    """Returns the HTTP status carried by a requests or openai error, if any"""
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    return status
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Reads Retry-After (seconds or HTTP date) or retry-after-ms from an error's response headers"""
+    headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        value = headers.get('retry-after')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def is_retryable(exc: Exception) -> bool:
+    # TimeoutError covers llmBackends.DeadlineExceeded
+    if isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TimeoutError)):
+        return True
+    status = error_status(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    try:
+        import openai
+    except ImportError:
+        return False
+    return isinstance(exc, openai.APIConnectionError)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for rate limiting (about four characters per token)"""
+    return len(text) // 4 + 1
+
+class SummaryScheduler:
+    """Runs LLM calls concurrently under in-flight, requests/min and tokens/min limits with retries"""
+
+    def __init__(self, max_in_flight: Optional[int] = None,
+                 requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_retries: Optional[int] = None,
+                 base_delay: float = 1.0, max_delay: float = 60.0):
+        if max_in_flight is None:
+            max_in_flight = int(os.getenv('LLM_MAX_IN_FLIGHT', '4'))
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv('LLM_REQUESTS_PER_MINUTE', '0'))
+        if tokens_per_minute is None:
+            tokens_per_minute = float(os.getenv('LLM_TOKENS_PER_MINUTE', '0'))
+        if max_retries is None:
+            max_retries = int(os.getenv('LLM_MAX_RETRIES', '5'))
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._pause_lock = threading.Lock()
+        self._paused_until = 0.0
+
+    def _wait_for_pause(self) -> None:
+        with self._pause_lock:
+            wait = self._paused_until - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+
+    def _pause(self, seconds: float) -> None:
+        with self._pause_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def backoff(self, attempt: int, exc: Exception) -> float:
+        """Full-jitter exponential backoff, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            delay = max(delay, retry_after + random.uniform(0, self.base_delay))
+            # Everyone shares the provider quota, so hold back the other workers too
+            self._pause(retry_after)
+        return delay
+
+    def run(self, call: Callable[[], R], tokens: int = 0) -> R:
+        """Executes call under the rate limits, retrying transient failures"""
+        attempt = 0
+        while True:
+            self._wait_for_pause()
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(tokens)
+            try:
+                with self._slots:
+                    return call()
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                attempt += 1
+                logging.warning(f"LLM call failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Applies fn to items on max_in_flight worker threads, preserving input order"""
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            return list(executor.map(fn, items))